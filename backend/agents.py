@@ -1,25 +1,139 @@
+import os
 import random
 import json
 import re
-from llm_client import LLMClient
+import time
+import asyncio
+from llm_client import get_llm_client
+from cv_cache import cv_cache, extract_skills
+from history import HistoryManager, truncate_words
+from encoders import text_encoder
+from question_bank import get_question_bank
+from metrics import ANSWERS_PRESCORED, QUESTIONS_SERVED, trace_event
+
+# Empty answers are scored without an LLM call; other answers get their embedding similarity
+# to the ideal answer as a hint in the scoring prompt
+SCORING_PRESCORE = os.getenv("SCORING_PRESCORE", "true").lower() == "true"
+# Average score a candidate must exceed to be hired (calibrate with outcome_store.recommend_threshold)
+HIRE_THRESHOLD = float(os.getenv("HIRE_THRESHOLD", "70"))
+
+class JSONFieldStreamParser:
+    """
+    Incrementally extracts the string value of one JSON field from a streamed completion.
+    feed() returns the newly decoded text of the field, so it can be forwarded as it arrives.
+    """
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field: str):
+        self.key_pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self.buffer = ""
+        self.pos = None  # index of the next unread character of the value
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        self.buffer += text
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = self.key_pattern.search(self.buffer)
+            if not match:
+                return ""
+            self.pos = match.end()
+
+        out = []
+        buf = self.buffer
+        while self.pos < len(buf):
+            ch = buf[self.pos]
+            if ch == '"':
+                self.done = True
+                break
+            if ch == '\\':
+                if self.pos + 1 >= len(buf):
+                    break  # wait for the rest of the escape sequence
+                code = buf[self.pos + 1]
+                if code == 'u':
+                    if self.pos + 6 > len(buf):
+                        break
+                    try:
+                        codepoint = int(buf[self.pos + 2:self.pos + 6], 16)
+                    except ValueError:
+                        codepoint = None
+                    if codepoint is not None and 0xD800 <= codepoint <= 0xDBFF:
+                        # A high surrogate is only valid combined with the low surrogate escape after it
+                        tail = buf[self.pos + 6:self.pos + 12]
+                        if len(tail) < 6 and '\\u'.startswith(tail[:2]):
+                            break  # the low surrogate may still arrive
+                        low = None
+                        if tail.startswith('\\u'):
+                            try:
+                                low = int(buf[self.pos + 8:self.pos + 12], 16)
+                            except ValueError:
+                                pass
+                        if low is not None and 0xDC00 <= low <= 0xDFFF:
+                            out.append(chr(0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)))
+                            self.pos += 12
+                        else:
+                            self.pos += 6  # unpaired, dropped
+                        continue
+                    if codepoint is not None and not 0xDC00 <= codepoint <= 0xDFFF:
+                        out.append(chr(codepoint))
+                    self.pos += 6
+                    continue
+                out.append(self.ESCAPES.get(code, code))
+                self.pos += 2
+                continue
+            out.append(ch)
+            self.pos += 1
+        return "".join(out)
 
 class ReasoningAgent:
     """
     Manages the interview flow, generates questions based on context.
     """
-    def __init__(self):
-        self.llm = LLMClient()
-        self.history = []
+    def __init__(self, question_bank=None):
+        self.llm = get_llm_client()
+        self.history = []  # full transcript (used for the report)
+        self.history_manager = HistoryManager()
+        self.question_bank = question_bank  # None uses the shared bank
 
-    def generate_question(self, context: dict) -> dict:
+    def _cv_digest(self, context: dict) -> str:
+        return context.get('cv_digest') or cv_cache.digest_for_text(context.get('cv_text', ''))
+
+    def _bank_question(self, context: dict):
+        """
+        Picks a stored question matching the CV skills and recent answers that has not been asked yet.
+        Returns None when the bank has no good match, so the question is generated instead.
+        """
+        bank = self.question_bank if self.question_bank is not None else get_question_bank()
+        if bank is None or not len(bank):
+            return None
+        started = time.perf_counter()
+        cv_digest = self._cv_digest(context)
+        recent_answers = [turn["content"] for turn in self.history[-4:] if turn["role"] == "candidate"]
+        asked = [turn["content"] for turn in self.history if turn["role"] == "agent"]
+        entry = bank.pick(" ".join([cv_digest] + recent_answers), extract_skills(cv_digest), asked)
+        trace_event("question_bank", time.perf_counter() - started)
+        if entry is None:
+            return None
+        QUESTIONS_SERVED.inc(source="bank")
+        self.history.append({"role": "agent", "content": entry["question"]})
+        return {"question": entry["question"], "ideal_answer": entry["ideal_answer"]}
+
+    def _build_prompts(self, context: dict) -> tuple:
         system_prompt = "You are an expert technical interviewer. Generate a relevant technical interview question based on the candidate's history and CV. \n\nIMPORTANT: You must output ONLY a valid JSON object with keys 'question' and 'ideal_answer'. Do not include any preambles or markdown code blocks.\n\nExample:\n{\"question\": \"What is polymorphism?\", \"ideal_answer\": \"Polymorphism allows objects to be treated as instances of their parent class...\"}"
         
-        cv_text = context.get('cv_text', 'No CV provided.')
-        
-        user_prompt = f"CV Content: {cv_text[:2000]}...\nContext: {context}.\nHistory: {self.history}.\nGenerate the next question and ideal answer as JSON."
-        
-        response = self.llm.completion(user_prompt, system_prompt)
+        # The compact digest stands in for the raw CV, which is kept out of the context too
+        cv_digest = self._cv_digest(context)
+        extra_context = "; ".join(
+            f"{key}: {truncate_words(str(val), 30)}" for key, val in context.items() if key not in ('cv_text', 'cv_digest', 'cv_id')
+        )
+        # Only a budgeted rendering of the transcript goes into the prompt
+        history = self.history_manager.render(self.history)
         
+        user_prompt = f"CV Digest: {cv_digest}\nContext: {extra_context or 'none'}\nHistory:\n{history}\nGenerate the next question and ideal answer as JSON."
+        return system_prompt, user_prompt
+
+    def _parse_question(self, response: str) -> dict:
         # Try to parse JSON from LLM response
         try:
             # Regex to find the first JSON object
@@ -42,9 +156,48 @@ class ReasoningAgent:
             question_text = response
             ideal_answer = "Evaluate based on relevance."
 
+        QUESTIONS_SERVED.inc(source="llm")
         self.history.append({"role": "agent", "content": question_text})
         return {"question": question_text, "ideal_answer": ideal_answer}
 
+    def generate_question(self, context: dict) -> dict:
+        banked = self._bank_question(context)
+        if banked:
+            return banked
+        system_prompt, user_prompt = self._build_prompts(context)
+        response = self.llm.completion(user_prompt, system_prompt, operation="generate_question")
+        return self._parse_question(response)
+
+    async def agenerate_question(self, context: dict) -> dict:
+        """
+        Async variant of generate_question for use inside the WebSocket handler.
+        """
+        banked = self._bank_question(context)
+        if banked:
+            return banked
+        system_prompt, user_prompt = self._build_prompts(context)
+        response = await self.llm.acompletion(user_prompt, system_prompt, operation="generate_question")
+        return self._parse_question(response)
+
+    async def astream_question(self, context: dict, on_chunk) -> dict:
+        """
+        Streams the question text to on_chunk (an async callable) as tokens arrive.
+        The ideal answer is recorded once the stream finishes; returns the same dict as generate_question.
+        """
+        banked = self._bank_question(context)
+        if banked:
+            await on_chunk(banked["question"])
+            return banked
+        system_prompt, user_prompt = self._build_prompts(context)
+        parser = JSONFieldStreamParser("question")
+        parts = []
+        async for delta in self.llm.astream(user_prompt, system_prompt, operation="generate_question"):
+            parts.append(delta)
+            text = parser.feed(delta)
+            if text:
+                await on_chunk(text)
+        return self._parse_question("".join(parts))
+
     def process_answer(self, answer: str):
         self.history.append({"role": "candidate", "content": answer})
 
@@ -52,15 +205,23 @@ class ScoringAgent:
     """
     Evaluates answers and assigns scores by comparing with ideal answer.
     """
+    SCORE_KEYS = ("technical_score", "communication_score", "confidence_score")
+
     def __init__(self):
-        self.llm = LLMClient()
+        self.llm = get_llm_client()
 
-    def evaluate(self, user_answer: str, ideal_answer: str) -> dict:
+    def _similarity_line(self, user_answer: str, ideal_answer: str) -> str:
+        similarity = self.similarity_hint(user_answer, ideal_answer)
+        if similarity is None:
+            return ""
+        return f"\nWording similarity to the ideal answer (0-1, a first-pass hint only): {similarity:.2f}"
+
+    def _build_prompts(self, user_answer: str, ideal_answer: str) -> tuple:
         system_prompt = "You are an expert evaluator. Compare the Candidate's Answer to the Ideal Answer. Rate from 0-100 on Technical Accuracy, Communication Clarity, and Confidence."
-        user_prompt = f"Question Context: (Hidden)\nIdeal Answer: {ideal_answer}\nCandidate Answer: {user_answer}\n\nProvide scores in JSON format: {{'technical_score': int, 'communication_score': int, 'confidence_score': int}}"
-        
-        response = self.llm.completion(user_prompt, system_prompt)
-        
+        user_prompt = f"Question Context: (Hidden)\nIdeal Answer: {ideal_answer}\nCandidate Answer: {user_answer}{self._similarity_line(user_answer, ideal_answer)}\n\nProvide scores in JSON format: {{'technical_score': int, 'communication_score': int, 'confidence_score': int}}"
+        return system_prompt, user_prompt
+
+    def _parse_scores(self, response: str) -> dict:
         default_scores = {"technical_score": 50, "communication_score": 50, "confidence_score": 50}
         
         try:
@@ -82,13 +243,125 @@ class ScoringAgent:
             print(f"Scoring Error: {e}")
             return default_scores
 
+    def prescore(self, user_answer: str, ideal_answer: str):
+        """
+        Scores an empty answer without an LLM call; None means the LLM has to score it.
+        Similarity alone measures neither communication nor confidence, so it never sets scores.
+        """
+        if not SCORING_PRESCORE:
+            return None
+        if not isinstance(user_answer, str) or not user_answer.strip():
+            ANSWERS_PRESCORED.inc(outcome="empty")
+            return {key: 0 for key in self.SCORE_KEYS}
+        return None
+
+    def similarity_hint(self, user_answer: str, ideal_answer: str):
+        """
+        Cosine similarity of local text embeddings, passed to the LLM as a hint (None if unavailable).
+        """
+        if not SCORING_PRESCORE or not isinstance(ideal_answer, str) or not ideal_answer.strip() or not isinstance(user_answer, str):
+            return None
+        started = time.perf_counter()
+        similarity = text_encoder.similarity(user_answer, ideal_answer)
+        trace_event("prescore", time.perf_counter() - started)
+        return max(0.0, min(1.0, similarity))
+
+    def evaluate(self, user_answer: str, ideal_answer: str) -> dict:
+        scores = self.prescore(user_answer, ideal_answer)
+        if scores is not None:
+            return scores
+        system_prompt, user_prompt = self._build_prompts(user_answer, ideal_answer)
+        response = self.llm.completion(user_prompt, system_prompt, operation="evaluate")
+        return self._parse_scores(response)
+
+    async def aevaluate(self, user_answer: str, ideal_answer: str) -> dict:
+        """
+        Async variant of evaluate for use inside the WebSocket handler.
+        """
+        scores = self.prescore(user_answer, ideal_answer)
+        if scores is not None:
+            return scores
+        system_prompt, user_prompt = self._build_prompts(user_answer, ideal_answer)
+        response = await self.llm.acompletion(user_prompt, system_prompt, operation="evaluate")
+        return self._parse_scores(response)
+
+    def _build_batch_prompts(self, items: list) -> tuple:
+        system_prompt = "You are an expert evaluator. For every numbered item, compare the Candidate's Answer to the Ideal Answer and rate from 0-100 on Technical Accuracy, Communication Clarity, and Confidence. Score each item independently.\n\nIMPORTANT: Output ONLY a JSON array with one object per item, no preambles or markdown."
+        blocks = [
+            f"Item {index}:\nQuestion: {item.get('question', '(Hidden)')}\nIdeal Answer: {item.get('ideal_answer', '')}\nCandidate Answer: {item.get('answer', '')}"
+            + self._similarity_line(item.get('answer', ''), item.get('ideal_answer', ''))
+            for index, item in enumerate(items)
+        ]
+        user_prompt = "\n\n".join(blocks) + "\n\nProvide scores as a JSON array: [{\"index\": int, \"technical_score\": int, \"communication_score\": int, \"confidence_score\": int}, ...]"
+        return system_prompt, user_prompt
+
+    def _parse_batch_scores(self, response: str, count: int) -> list:
+        """
+        Returns a list of length count holding a validated score dict or None for each item.
+        """
+        results = [None] * count
+        try:
+            clean_response = response.replace("```json", "").replace("```", "").strip()
+            match = re.search(r'\[.*\]', clean_response, re.DOTALL)
+            if not match:
+                return results
+            entries = json.loads(match.group(0))
+        except Exception as e:
+            print(f"Batch Scoring Error: {e}")
+            return results
+
+        for position, entry in enumerate(entries if isinstance(entries, list) else []):
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("index", position)
+            if not isinstance(index, int) or not 0 <= index < count or results[index] is not None:
+                continue
+            try:
+                scores = {key: int(entry[key]) for key in self.SCORE_KEYS}
+            except (KeyError, TypeError, ValueError):
+                continue
+            if all(0 <= val <= 100 for val in scores.values()):
+                results[index] = scores
+        return results
+
+    async def aevaluate_batch(self, items: list) -> list:
+        """
+        Scores several {"question", "ideal_answer", "answer"} items with one LLM request.
+        Items missing or invalid in the batch response are re-scored individually.
+        """
+        if not items:
+            return []
+        results = [self.prescore(item.get("answer", ""), item.get("ideal_answer", "")) for item in items]
+        pending = [index for index, scores in enumerate(results) if scores is None]
+        if len(pending) == 1:
+            index = pending[0]
+            results[index] = await self.aevaluate(items[index].get("answer", ""), items[index].get("ideal_answer", ""))
+        elif pending:
+            system_prompt, user_prompt = self._build_batch_prompts([items[index] for index in pending])
+            response = await self.llm.acompletion(user_prompt, system_prompt, operation="evaluate_batch")
+            for index, scores in zip(pending, self._parse_batch_scores(response, len(pending))):
+                results[index] = scores
+
+        missing = [index for index, scores in enumerate(results) if scores is None]
+        if missing:
+            print(f"Batch scoring: falling back to single evaluation for {len(missing)}/{len(items)} items")
+            fallback = await asyncio.gather(*(
+                self.aevaluate(items[index].get("answer", ""), items[index].get("ideal_answer", "")) for index in missing
+            ))
+            for index, scores in zip(missing, fallback):
+                results[index] = scores
+        return results
+
 class DecisionAgent:
     """
     Makes final hiring recommendation.
     """
+    def __init__(self, hire_threshold: float = HIRE_THRESHOLD):
+        self.hire_threshold = hire_threshold
+
     def make_decision(self, aggregate_scores: dict) -> dict:
         avg_score = sum(val for key, val in aggregate_scores.items() if isinstance(val, (int, float))) / 3
-        recommendation = "HIRE" if avg_score > 70 else "REJECT"
+        recommendation = "HIRE" if avg_score > self.hire_threshold else "REJECT"
         return {
             "final_score": round(avg_score, 2),
             "decision": recommendation,
@@ -0,0 +1,243 @@
+"""
+Streaming audio for spoken answers: a ring buffer of PCM samples, energy-based voice activity
+detection that closes an utterance after trailing silence, and pluggable speech-to-text backends.
+"""
+from __future__ import annotations
+
+import os
+import hashlib
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+try:
+    import opuslib  # optional, only needed for Opus chunks
+except ImportError:
+    opuslib = None
+
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+# Client-declared sample rates outside this range are ignored (they size the ring buffer)
+AUDIO_MIN_SAMPLE_RATE = 8000
+AUDIO_MAX_SAMPLE_RATE = 48000
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+AUDIO_BUFFER_SECONDS = float(os.getenv("AUDIO_BUFFER_SECONDS", "120"))
+
+# Voice activity detection tuning (RMS levels in int16 units)
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+VAD_ENERGY_RATIO = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", "1200"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "300"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "200"))
+
+STT_BACKEND = os.getenv("STT_BACKEND", "auto")  # auto | faster-whisper | stub (placeholder text, tests only)
+STT_MODEL = os.getenv("STT_MODEL", "base.en")
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+
+
+def parse_sample_rate(value, default: int = AUDIO_SAMPLE_RATE) -> int:
+    """
+    A client-supplied sample rate as an int within the supported range, otherwise default.
+    """
+    try:
+        rate = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return default
+    return rate if AUDIO_MIN_SAMPLE_RATE <= rate <= AUDIO_MAX_SAMPLE_RATE else default
+
+
+def pcm16_to_array(data) -> np.ndarray:
+    """
+    Little-endian 16-bit mono PCM (bytes or memoryview) to an int16 array, without copying.
+    A trailing odd byte is ignored.
+    """
+    view = memoryview(data).cast("B")
+    return np.frombuffer(view[:len(view) - len(view) % 2], dtype="<i2")
+
+
+class RingBuffer:
+    """
+    Fixed-capacity int16 sample buffer; writes beyond capacity overwrite the oldest samples.
+    Positions are absolute sample counts since the stream started.
+    """
+    def __init__(self, capacity: int):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.end = 0
+
+    @property
+    def start(self) -> int:
+        return max(0, self.end - self.capacity)
+
+    def write(self, samples: np.ndarray):
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[count - self.capacity:]
+        pos = (self.end + count - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - pos)
+        self.data[pos:pos + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.end += count
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        start, stop = max(start, self.start), min(stop, self.end)
+        if stop <= start:
+            return np.zeros(0, dtype=np.int16)
+        pos = start % self.capacity
+        length = stop - start
+        if pos + length <= self.capacity:
+            return self.data[pos:pos + length].copy()
+        return np.concatenate((self.data[pos:], self.data[:length - (self.capacity - pos)]))
+
+
+class VoiceActivityDetector:
+    """
+    Frame energy compared against an adaptive noise floor. feed() returns the (start, stop)
+    sample ranges of utterances that ended with at least end_silence_ms of silence.
+    """
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 end_silence_ms: int = VAD_END_SILENCE_MS, min_speech_ms: int = VAD_MIN_SPEECH_MS):
+        self.frame = max(1, sample_rate * frame_ms // 1000)
+        self.end_silence = sample_rate * end_silence_ms // 1000
+        self.min_speech = sample_rate * min_speech_ms // 1000
+        self.preroll = sample_rate * VAD_PREROLL_MS // 1000
+        self.noise_floor = VAD_MIN_RMS / VAD_ENERGY_RATIO
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.position = 0  # absolute sample index after the last analysed frame
+        self.speech_start = None
+        self.last_voiced = 0
+        self.voiced = 0
+
+    def feed(self, samples: np.ndarray) -> list:
+        if len(self.remainder):
+            samples = np.concatenate((self.remainder, samples))
+        count = len(samples) // self.frame
+        self.remainder = samples[count * self.frame:]
+        if count == 0:
+            return []
+
+        # RMS of every frame in the chunk at once
+        frames = samples[:count * self.frame].reshape(count, self.frame).astype(np.float32)
+        levels = np.sqrt(np.mean(frames * frames, axis=1))
+
+        finished = []
+        for level in levels:
+            frame_start = self.position
+            self.position += self.frame
+            if level >= max(VAD_MIN_RMS, self.noise_floor * VAD_ENERGY_RATIO):
+                if self.speech_start is None:
+                    self.speech_start = max(0, frame_start - self.preroll)
+                    self.voiced = 0
+                self.voiced += self.frame
+                self.last_voiced = self.position
+                continue
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(level)
+            if self.speech_start is not None and self.position - self.last_voiced >= self.end_silence:
+                finished.extend(self._close())
+        return finished
+
+    def flush(self) -> list:
+        """
+        Ends the current utterance now (e.g. the client stopped recording).
+        """
+        return self._close() if self.speech_start is not None else []
+
+    def _close(self) -> list:
+        span = (self.speech_start, self.last_voiced)
+        self.speech_start = None
+        return [span] if self.voiced >= self.min_speech else []
+
+
+class AudioStream:
+    """
+    One session's incoming audio. feed() buffers a chunk and returns the samples of every
+    utterance the chunk completed.
+    """
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE, buffer_seconds: float = AUDIO_BUFFER_SECONDS):
+        self.sample_rate = sample_rate
+        self.buffer = RingBuffer(int(sample_rate * buffer_seconds))
+        self.vad = VoiceActivityDetector(sample_rate)
+        self.opus_decoder = None
+        self.partial = b""
+
+    def _decode(self, data, fmt: str) -> np.ndarray:
+        if fmt == "pcm16":
+            # A sample split across two chunks is completed by the next one
+            if self.partial or len(data) % 2:
+                data = self.partial + bytes(data)
+                self.partial = data[len(data) - len(data) % 2:]
+            return pcm16_to_array(data)
+        if fmt == "opus":
+            # Each chunk carries exactly one Opus packet
+            if opuslib is None:
+                raise ValueError("Opus audio needs the optional opuslib package")
+            if self.sample_rate not in OPUS_SAMPLE_RATES:
+                raise ValueError(f"Opus audio must be sampled at one of {OPUS_SAMPLE_RATES} Hz")
+            try:
+                if self.opus_decoder is None:
+                    self.opus_decoder = opuslib.Decoder(self.sample_rate, 1)
+                return pcm16_to_array(self.opus_decoder.decode(bytes(data), self.sample_rate * 120 // 1000))
+            except Exception as e:
+                # opuslib raises its own OpusError for corrupt packets
+                raise ValueError(f"Invalid Opus packet: {e}")
+        raise ValueError(f"Unsupported audio format: {fmt}")
+
+    def feed(self, data, fmt: str = "pcm16") -> list:
+        samples = self._decode(data, fmt)
+        self.buffer.write(samples)
+        return [self.buffer.read(start, stop) for start, stop in self.vad.feed(samples)]
+
+    def flush(self) -> list:
+        return [self.buffer.read(start, stop) for start, stop in self.vad.flush()]
+
+
+class StubTranscriber:
+    """
+    Deterministic local stand-in for tests and load runs: describes the utterance instead of
+    recognising words, and the same audio always gives the same text.
+    """
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> str:
+        digest = hashlib.sha1(samples.tobytes()).hexdigest()[:8]
+        return f"[spoken answer, {len(samples) / sample_rate:.1f}s, {digest}]"
+
+
+class FasterWhisperTranscriber:
+    """
+    Local Whisper on the CPU through the optional faster-whisper package.
+    """
+    def __init__(self, model: str = STT_MODEL, workers: int = STT_WORKERS):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model, device="cpu", compute_type="int8", num_workers=workers)
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> str:
+        audio = samples.astype(np.float32) / 32768.0
+        if sample_rate != 16000:
+            # Whisper expects 16 kHz; linear interpolation is enough for speech
+            target = np.arange(0, len(audio), sample_rate / 16000)
+            audio = np.interp(target, np.arange(len(audio)), audio).astype(np.float32)
+        segments, _ = self.model.transcribe(audio, beam_size=1, language="en")
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class SpeechToTextUnavailable(Exception):
+    pass
+
+
+def create_transcriber(backend: str = STT_BACKEND):
+    """
+    The configured speech-to-text backend. The stub never stands in for a missing real backend,
+    since its placeholder text would be scored as the candidate's answer; with "auto" and no
+    faster-whisper installed this raises SpeechToTextUnavailable.
+    """
+    if backend == "stub":
+        return StubTranscriber()
+    if backend not in ("auto", "faster-whisper"):
+        raise ValueError(f"Unknown STT_BACKEND: {backend}")
+    try:
+        return FasterWhisperTranscriber()
+    except ImportError:
+        if backend == "faster-whisper":
+            raise
+        raise SpeechToTextUnavailable("Spoken answers need the faster-whisper package (or STT_BACKEND=stub for tests)")
+
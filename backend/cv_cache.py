@@ -0,0 +1,128 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+CV_CACHE_SIZE = int(os.getenv("CV_CACHE_SIZE", "512"))
+CV_CACHE_DIR = os.getenv("CV_CACHE_DIR")  # optional on-disk persistence
+CV_DIGEST_CHARS = int(os.getenv("CV_DIGEST_CHARS", "600"))
+
+SKILL_KEYWORDS = [
+    "python", "java", "javascript", "typescript", "c++", "c#", "golang", "rust", "ruby", "php", "kotlin", "swift", "scala",
+    "sql", "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "kafka", "spark", "hadoop",
+    "react", "angular", "vue", "node", "django", "flask", "fastapi", "spring", ".net",
+    "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "linux", "git", "ci/cd",
+    "machine learning", "deep learning", "nlp", "computer vision", "pytorch", "tensorflow", "scikit-learn",
+    "pandas", "numpy", "llm", "data engineering", "microservices", "rest", "graphql",
+]
+_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+_SKILL_PATTERNS = [(skill, re.compile(r'(?<![\w+#.])' + re.escape(skill) + r'(?![\w+#])')) for skill in SKILL_KEYWORDS]
+
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def extract_skills(text: str) -> list:
+    lowered = text.lower()
+    return [skill for skill, pattern in _SKILL_PATTERNS if pattern.search(lowered)]
+
+
+def build_cv_digest(text: str, max_chars: int = CV_DIGEST_CHARS) -> str:
+    """
+    Compact CV summary for prompts: detected skills plus the start of the whitespace-normalised text.
+    """
+    condensed = " ".join(text.split())
+    if not condensed:
+        return "No CV provided."
+    skills = extract_skills(condensed)
+    summary = condensed[:max_chars] + ("..." if len(condensed) > max_chars else "")
+    return f"Skills: {', '.join(skills) if skills else 'not detected'}\nSummary: {summary}"
+
+
+class CVCache:
+    """
+    LRU cache of extracted CV text and digest, keyed by content hash.
+    If a directory is given, entries are also persisted as JSON files and reloaded on a miss.
+    """
+    def __init__(self, max_entries: int = CV_CACHE_SIZE, cache_dir: str = CV_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+        # Keys can come from clients, so only plain SHA-256 hex names ever touch the filesystem
+        if self.cache_dir and _KEY_PATTERN.fullmatch(key) and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                self._remember(key, entry)
+                return entry
+            except (OSError, ValueError) as e:
+                print(f"CV cache read error for {key}: {e}")
+        return None
+
+    def put(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.cache_dir:
+            try:
+                tmp_path = self._path(key) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, self._path(key))
+                self._evict_disk()
+            except OSError as e:
+                print(f"CV cache write error for {key}: {e}")
+
+    def _remember(self, key: str, entry: dict):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _evict_disk(self):
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def store_text(self, key: str, text: str) -> dict:
+        entry = {"cv_id": key, "text": text, "digest": build_cv_digest(text)}
+        self.put(key, entry)
+        return entry
+
+    def digest_for_text(self, text: str) -> str:
+        """
+        Digest for CV text sent directly by the client (no upload), cached by text hash.
+        """
+        key = "text-" + hash_bytes(text.encode("utf-8"))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry["digest"]
+        digest = build_cv_digest(text)
+        self._remember(key, {"digest": digest})
+        return digest
+
+
+cv_cache = CVCache()
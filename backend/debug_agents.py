@@ -11,8 +11,10 @@ print(f"API Key present: {bool(os.getenv('GROQ_API_KEY'))}")
 
 try:
     from agents import ReasoningAgent
+    from question_bank import QuestionBank
     print("Initializing ReasoningAgent...")
-    agent = ReasoningAgent()
+    # An empty question bank, so the question has to come from the LLM
+    agent = ReasoningAgent(question_bank=QuestionBank(path=None))
     
     print("Attempting to generate question...")
     context = {"candidate_name": "Test User", "cv_text": "Experienced Python Developer with 5 years in AI."}
@@ -1,8 +1,262 @@
+import os
+import time
+import asyncio
+import sqlite3
+import smtplib
+import threading
+from email.message import EmailMessage
+
+SMTP_HOST = os.getenv("SMTP_HOST")  # unset -> emails are printed (simulated)
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+EMAIL_FROM = os.getenv("EMAIL_FROM", "interviews@example.com")
+
+EMAIL_OUTBOX_PATH = os.getenv("EMAIL_OUTBOX_PATH", "outbox.db")
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "2"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_BACKOFF_BASE = float(os.getenv("EMAIL_BACKOFF_BASE", "5"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "1"))
+EMAIL_CLAIM_TIMEOUT = float(os.getenv("EMAIL_CLAIM_TIMEOUT", "300"))
+
+
+class ConsoleTransport:
+    """
+    Prints emails instead of sending them (the default when SMTP_HOST is not set).
+    """
+    def send_batch(self, messages: list) -> list:
+        for message in messages:
+            print(f"--- SIMULATING EMAIL TO {message['to']} ---")
+            print(f"Subject: {message['subject']}")
+            print(f"Body: \n{message['body']}")
+            print("--------------------------------------")
+        return [None] * len(messages)
+
+
+class SMTPTransport:
+    """
+    Sends a batch over one SMTP connection. Returns one error string (or None) per message.
+    """
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, user: str = SMTP_USER,
+                 password: str = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS, sender: str = EMAIL_FROM):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.sender = sender
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        if self.starttls:
+            conn.starttls()
+        if self.user:
+            conn.login(self.user, self.password)
+        return conn
+
+    def send_batch(self, messages: list) -> list:
+        errors = []
+        conn = None
+        try:
+            conn = self._connect()
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message["to"]
+                email["Subject"] = message["subject"]
+                email.set_content(message["body"])
+                try:
+                    conn.send_message(email)
+                    errors.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    # Per-message rejection; the connection stays usable
+                    errors.append(f"{type(e).__name__}: {e}")
+                except smtplib.SMTPServerDisconnected:
+                    # Reconnect once and retry this message; remaining ones reuse the new connection
+                    conn = self._connect()
+                    conn.send_message(email)
+                    errors.append(None)
+        except (smtplib.SMTPException, OSError) as e:
+            errors.extend([f"{type(e).__name__}: {e}"] * (len(messages) - len(errors)))
+        finally:
+            if conn is not None:
+                try:
+                    conn.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+        return errors
+
+
+class EmailOutbox:
+    """
+    Durable SQLite queue of outgoing emails. Messages are claimed in batches so that
+    several workers (or processes sharing the file) never send the same row twice.
+    """
+    def __init__(self, path: str = EMAIL_OUTBOX_PATH):
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, to_email TEXT, subject TEXT, body TEXT, "
+                "status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, next_attempt_at REAL, "
+                "claimed_at REAL, last_error TEXT, created_at REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+            self.db.commit()
+
+    def enqueue(self, to_email: str, subject: str, body: str) -> int:
+        now = time.time()
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO outbox (to_email, subject, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (to_email, subject, body, now, now),
+            )
+            self.db.commit()
+        return cursor.lastrowid
+
+    def claim_batch(self, limit: int) -> list:
+        now = time.time()
+        with self.lock:
+            try:
+                self.db.execute("BEGIN IMMEDIATE")
+                # Rows left in 'sending' by a crashed worker become due again
+                self.db.execute(
+                    "UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                    (now - EMAIL_CLAIM_TIMEOUT,),
+                )
+                rows = self.db.execute(
+                    "SELECT id, to_email, subject, body, attempts FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                if rows:
+                    self.db.executemany(
+                        "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                        [(now, row[0]) for row in rows],
+                    )
+                self.db.commit()
+            except sqlite3.Error:
+                # e.g. "database is locked" past the busy timeout; leave no transaction open
+                if self.db.in_transaction:
+                    self.db.rollback()
+                raise
+        return [{"id": row[0], "to": row[1], "subject": row[2], "body": row[3], "attempts": row[4]} for row in rows]
+
+    def complete(self, results: list):
+        """
+        results: (message, error) pairs. Failed messages are rescheduled with exponential backoff.
+        """
+        now = time.time()
+        updates_sent, updates_retry = [], []
+        for message, error in results:
+            if error is None:
+                updates_sent.append((message["id"],))
+                continue
+            attempts = message["attempts"] + 1
+            status = "failed" if attempts >= EMAIL_MAX_ATTEMPTS else "pending"
+            updates_retry.append((status, attempts, now + EMAIL_BACKOFF_BASE * (2 ** (attempts - 1)), error, message["id"]))
+        with self.lock:
+            try:
+                self.db.executemany("UPDATE outbox SET status = 'sent', last_error = NULL WHERE id = ?", updates_sent)
+                self.db.executemany(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    updates_retry,
+                )
+                self.db.commit()
+            except sqlite3.Error:
+                if self.db.in_transaction:
+                    self.db.rollback()
+                raise
+
+    def counts(self) -> dict:
+        with self.lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
 class EmailService:
+    """
+    Sends interview emails. Once started, send_email only enqueues into the durable outbox
+    and a pool of background workers delivers batches; before that it sends directly.
+    """
+    def __init__(self, transport=None, outbox_path: str = EMAIL_OUTBOX_PATH, workers: int = EMAIL_WORKERS,
+                 batch_size: int = EMAIL_BATCH_SIZE):
+        self.transport = transport or (SMTPTransport() if SMTP_HOST else ConsoleTransport())
+        self.outbox_path = outbox_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.outbox = None
+        self.tasks = []
+        self.wakeup = None
+
     def send_email(self, to_email: str, subject: str, body: str):
-        # Placeholder for SMTP/SendGrid/SES
-        print(f"--- SIMULATING EMAIL TO {to_email} ---")
-        print(f"Subject: {subject}")
-        print(f"Body: \n{body}")
-        print("--------------------------------------")
+        if self.outbox is None:
+            errors = self.transport.send_batch([{"to": to_email, "subject": subject, "body": body}])
+            return errors[0] is None
+        self.outbox.enqueue(to_email, subject, body)
+        self.wakeup.set()
         return True
+
+    async def asend_email(self, to_email: str, subject: str, body: str):
+        """
+        send_email for the event loop: the SQLite enqueue (or direct send) runs in a thread.
+        """
+        if self.outbox is None:
+            return await asyncio.to_thread(self.send_email, to_email, subject, body)
+        await asyncio.to_thread(self.outbox.enqueue, to_email, subject, body)
+        self.wakeup.set()
+        return True
+
+    async def start(self):
+        if self.tasks:
+            return
+        self.outbox = EmailOutbox(self.outbox_path)
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.outbox = None
+
+    async def _worker(self):
+        failures = 0
+        while True:
+            try:
+                await self._work_once()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. "database is locked" while another process holds the outbox; retry with backoff
+                failures += 1
+                delay = min(EMAIL_POLL_INTERVAL * (2 ** failures), 60)
+                print(f"Email outbox worker error ({type(e).__name__}: {e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _work_once(self):
+        """
+        Claims and delivers one batch, or waits for new mail when nothing is due.
+        """
+        batch = await asyncio.to_thread(self.outbox.claim_batch, self.batch_size)
+        if not batch:
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), EMAIL_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            return
+        try:
+            errors = await asyncio.to_thread(self.transport.send_batch, batch)
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"] * len(batch)
+        for message, error in zip(batch, errors):
+            if error:
+                print(f"Email to {message['to']} failed (attempt {message['attempts'] + 1}): {error}")
+        await asyncio.to_thread(self.outbox.complete, list(zip(batch, errors)))
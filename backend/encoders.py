@@ -1,14 +1,128 @@
-from typing import Any
+from __future__ import annotations
+
+import os
+import re
+import zlib
+import threading
+from typing import Any, List
+
+from lazy_imports import lazy_import
+from audio_stream import AudioStream, AUDIO_SAMPLE_RATE, SpeechToTextUnavailable, create_transcriber, pcm16_to_array
+
+np = lazy_import("numpy")
+
+TEXT_EMBEDDING_DIM = int(os.getenv("TEXT_EMBEDDING_DIM", "1024"))
+
+STOP_WORDS = frozenset(
+    "a an the and or but if then so of to in on at by for with from as is are was were be been being "
+    "it its this that these those i you he she we they me my our your their them his her "
+    "do does did have has had will would can could should may might must not no yes "
+    "what which who whom how when where why there here about into than too very just also".split()
+)
+
 
 class TextEncoder:
-    def encode(self, text: str) -> str:
-        # Placeholder for text embedding/processing
-        return f"Encoded_Text[{len(text)}]"
+    """
+    Local embedding: hashed word unigrams, word bigrams and character trigrams, log-scaled and
+    L2-normalised, so the dot product of two vectors is their cosine similarity. No model, GPU or network.
+    """
+    VERSION = 2  # bump whenever the features change, so saved embedding indexes are rebuilt
+    # Keeps "node.js", "3.11", "c++" and "c#" whole; a trailing sentence period is not part of the word
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*[+#]*")
+
+    def __init__(self, dim: int = TEXT_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in self.TOKEN_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+        features = ["w:" + word for word in words]
+        features.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.extend("c:" + padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) float32 matrix with unit-length rows (all-zero rows for empty texts).
+        """
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            # crc32 is stable across processes, unlike hash()
+            hashed = [zlib.crc32(feature.encode()) % self.dim for feature in self._features(text or "")]
+            rows.extend([row] * len(hashed))
+            columns.extend(hashed)
+
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if columns:
+            np.add.at(counts, (np.asarray(rows), np.asarray(columns)), 1.0)
+        vectors = np.log1p(counts)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_batch([text])[0]
+
+    def similarity(self, first: str, second: str) -> float:
+        vectors = self.encode_batch([first, second])
+        return cosine_similarity(vectors[0], vectors[1])
+
+
+def cosine_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    denominator = float(np.linalg.norm(first) * np.linalg.norm(second))
+    return float(np.dot(first, second) / denominator) if denominator else 0.0
+
+
+text_encoder = TextEncoder()
 
 class AudioEncoder:
-    def encode(self, audio_data: Any) -> str:
-        # Placeholder for STT (Whisper/DeepSpeech) processing
-        return "Encoded_Audio_Transcript"
+    """
+    Speech to text behind a pluggable backend (see audio_stream.create_transcriber).
+    The backend is loaded on first use, since speech models take a while to load.
+    """
+    def __init__(self, transcriber=None):
+        self.transcriber = transcriber
+        self.unavailable = None  # SpeechToTextUnavailable from the first load, so it is not retried
+        self.lock = threading.Lock()
+
+    def _get_transcriber(self):
+        if self.transcriber is None:
+            with self.lock:
+                if self.transcriber is None and self.unavailable is None:
+                    try:
+                        self.transcriber = create_transcriber()
+                    except Exception as e:
+                        # Missing package, unknown STT_BACKEND or a model that fails to load
+                        print(f"Speech to text disabled: {type(e).__name__}: {e}")
+                        self.unavailable = e if isinstance(e, SpeechToTextUnavailable) else SpeechToTextUnavailable(f"{type(e).__name__}: {e}")
+        if self.transcriber is None:
+            raise self.unavailable
+        return self.transcriber
+
+    def available(self) -> bool:
+        """
+        Whether a speech-to-text backend is installed (loads it on the first call).
+        """
+        try:
+            self._get_transcriber()
+            return True
+        except SpeechToTextUnavailable:
+            return False
+
+    def create_stream(self, sample_rate: int = AUDIO_SAMPLE_RATE) -> AudioStream:
+        return AudioStream(sample_rate)
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int = AUDIO_SAMPLE_RATE) -> str:
+        if len(samples) == 0:
+            return ""
+        return self._get_transcriber().transcribe(samples, sample_rate)
+
+    def encode(self, audio_data: Any, sample_rate: int = AUDIO_SAMPLE_RATE) -> str:
+        """
+        Transcribes a complete recording: 16-bit mono PCM bytes or an int16 array.
+        """
+        samples = audio_data if isinstance(audio_data, np.ndarray) else pcm16_to_array(audio_data)
+        return self.transcribe(samples, sample_rate)
 
 class VideoEncoder:
     def encode(self, video_frames: Any) -> dict:
@@ -26,7 +140,8 @@ class MultimodalEncoder:
         if text:
             results['text'] = self.text_enc.encode(text)
         if audio:
-            results['audio'] = self.audio_enc.encode(audio)
+            # None when no speech-to-text backend is installed
+            results['audio'] = self.audio_enc.encode(audio) if self.audio_enc.available() else None
         if video:
             results['video'] = self.video_enc.encode(video)
         return results
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the Groq / OpenAI chat completions API, for benchmarks and offline runs.
+
+    python fake_llm_server.py --port 8100 --latency-ms 300 --tokens-per-second 200
+
+Point the backend at it with GROQ_BASE_URL=http://127.0.0.1:8100 and any non-empty GROQ_API_KEY.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+config = {"latency_ms": 300.0, "jitter_ms": 50.0, "tokens_per_second": 200.0}
+
+app = FastAPI()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def fake_content(system_prompt: str, prompt: str) -> str:
+    """
+    Returns a plausible response for the prompt shapes the agents send.
+    """
+    if "JSON array" in prompt:
+        count = len(re.findall(r'^Item \d+:', prompt, re.MULTILINE))
+        return json.dumps([
+            {"index": i, "technical_score": random.randint(40, 95), "communication_score": random.randint(40, 95), "confidence_score": random.randint(40, 95)}
+            for i in range(count)
+        ])
+    if "ideal_answer" in system_prompt:
+        topic = random.choice(["hash maps", "database indexes", "async IO", "REST API design", "garbage collection", "unit testing"])
+        return json.dumps({
+            "question": f"Can you explain how {topic} work and when you would use them in a real project?",
+            "ideal_answer": f"A strong answer describes the core mechanics of {topic}, their trade-offs and a concrete example from practice.",
+        })
+    if "score" in prompt.lower():
+        return json.dumps({"technical_score": random.randint(40, 95), "communication_score": random.randint(40, 95), "confidence_score": random.randint(40, 95)})
+    return "I understand. Please continue."
+
+
+def _split_tokens(text: str) -> list:
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+async def _first_byte_delay():
+    delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    system_prompt = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    content = fake_content(system_prompt, prompt)
+    model = body.get("model", "fake-model")
+    completion_id = f"chatcmpl-{random.getrandbits(48):x}"
+    created = int(time.time())
+    usage = {
+        "prompt_tokens": _estimate_tokens(system_prompt + prompt),
+        "completion_tokens": _estimate_tokens(content),
+        "total_tokens": _estimate_tokens(system_prompt + prompt) + _estimate_tokens(content),
+    }
+
+    await _first_byte_delay()
+
+    if not body.get("stream"):
+        # Non-streaming responses still pay the generation time
+        await asyncio.sleep(usage["completion_tokens"] / config["tokens_per_second"])
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    async def events():
+        interval = 1.0 / config["tokens_per_second"]
+        for token in _split_tokens(content):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(interval)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": usage},
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq/OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=config["latency_ms"], help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=config["jitter_ms"])
+    parser.add_argument("--tokens-per-second", type=float, default=config["tokens_per_second"])
+    args = parser.parse_args()
+    config.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_second=args.tokens_per_second)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
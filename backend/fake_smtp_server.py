@@ -0,0 +1,117 @@
+"""
+Minimal local SMTP server that keeps received messages in memory, for tests and load runs.
+
+    python fake_smtp_server.py --port 8025 --fail-rate 0.1
+
+Point the backend at it with SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=false.
+"""
+import random
+import asyncio
+import argparse
+from email import message_from_bytes
+
+
+class LocalSMTPServer:
+    """
+    Speaks just enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT).
+    fail_rate makes that share of DATA commands return a transient 451 error.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, fail_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.messages = []  # {"from", "to", "message"}
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        mail_from, rcpt_to = None, []
+        await reply("220 localhost fake SMTP ready")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 localhost")
+                elif verb == "MAIL":
+                    mail_from, rcpt_to = command[10:].strip(" <>"), []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    rcpt_to.append(command[8:].strip(" <>"))
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if line in (b".\r\n", b".\n", b""):
+                            break
+                        lines.append(line[1:] if line.startswith(b"..") else line)
+                    if random.random() < self.fail_rate:
+                        await reply("451 Temporary failure, try again later")
+                    else:
+                        self.messages.append({"from": mail_from, "to": rcpt_to, "message": message_from_bytes(b"".join(lines))})
+                        await reply("250 OK: queued")
+                    mail_from, rcpt_to = None, []
+                elif verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    server = LocalSMTPServer(args.host, args.port, args.fail_rate)
+    await server.start()
+    print(f"Fake SMTP server listening on {server.host}:{server.port}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(f"Received {len(server.messages)} messages over {server.connections} connections")
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake SMTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+import asyncio
+import base64
+import struct
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+from metrics import FRAME_DECODE, FRAME_DETECT, FRAMES_DROPPED, FRAME_QUEUE_DEPTH, FRAME_BATCH
+
+# Frame analysis tuning
+FRAME_ANALYSIS_FPS = float(os.getenv("FRAME_ANALYSIS_FPS", "2"))
+FRAME_QUEUE_SIZE = int(os.getenv("FRAME_QUEUE_SIZE", "2"))
+FRAME_MAX_WIDTH = int(os.getenv("FRAME_MAX_WIDTH", "320"))
+FRAME_WORKERS = int(os.getenv("FRAME_WORKERS", str(os.cpu_count() or 2)))
+FRAME_BATCH_SIZE = int(os.getenv("FRAME_BATCH_SIZE", "16"))
+FRAME_BATCH_WAIT_MS = float(os.getenv("FRAME_BATCH_WAIT_MS", "10"))
+
+# Binary socket messages: 1 byte kind, 1 byte format, 4 byte sequence number, then raw media bytes
+BINARY_HEADER = struct.Struct("!BBI")
+MSG_VIDEO_FRAME = 0x01
+MSG_AUDIO_CHUNK = 0x02
+FORMAT_JPEG = 0x01
+FORMAT_WEBP = 0x02
+FORMAT_PCM16 = 0x10  # 16-bit little-endian mono PCM
+FORMAT_OPUS = 0x11  # one Opus packet per message
+AUDIO_FORMATS = {FORMAT_PCM16: "pcm16", FORMAT_OPUS: "opus"}
+
+
+def parse_binary_message(data: bytes):
+    """
+    Splits a binary socket message into (kind, format, sequence, body) without copying the body.
+    Returns None if the message is shorter than the header.
+    """
+    if len(data) < BINARY_HEADER.size:
+        return None
+    kind, fmt, sequence = BINARY_HEADER.unpack_from(data)
+    return kind, fmt, sequence, memoryview(data)[BINARY_HEADER.size:]
+
+
+# OpenCV releases the GIL while decoding and detecting, so a thread pool is enough
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=FRAME_WORKERS, thread_name_prefix="frame")
+    return _executor
+
+
+def decode_frame(payload, max_width: int = FRAME_MAX_WIDTH):
+    """
+    Decodes a data URL / base64 string, or raw encoded bytes (bytes or memoryview),
+    into a BGR frame downscaled to at most max_width pixels wide.
+    """
+    if isinstance(payload, str):
+        encoded_data = payload.split(',', 1)[1] if ',' in payload else payload
+        payload = base64.b64decode(encoded_data)
+    nparr = np.frombuffer(payload, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+
+    height, width = frame.shape[:2]
+    if max_width and width > max_width:
+        scale = max_width / width
+        frame = cv2.resize(frame, (max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+class FramePipeline:
+    """
+    Per-session video analysis: a small bounded queue that drops stale frames,
+    a rate limit on analysed frames and decode/detection on a worker pool.
+    With a shared FrameAnalysisService the frames are analysed in its cross-session batches
+    instead of by a task of this session.
+    """
+    def __init__(self, detector, on_result, max_fps: float = FRAME_ANALYSIS_FPS, queue_size: int = FRAME_QUEUE_SIZE,
+                 service=None):
+        self.detector = detector
+        self.on_result = on_result  # async callable receiving each detection result
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.last_accepted = 0.0
+        self.dropped = 0
+        self.task = None
+        # Shared-service state: frames waiting here, and at most one of them in flight at a time
+        self.service = service
+        self.pending = deque()
+        self.queue_size = queue_size
+        self.in_flight = False
+        self.scheduled = False
+        self.closed = False
+
+    def start(self):
+        if self.task is None and self.service is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.closed = True
+        FRAME_QUEUE_DEPTH.dec(len(self.pending))
+        self.pending.clear()
+        # Frames still queued no longer count towards the global depth
+        FRAME_QUEUE_DEPTH.dec(self.queue.qsize())
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def submit(self, payload) -> bool:
+        """
+        Queues a frame without blocking. Returns False if the frame was skipped.
+        """
+        now = time.monotonic()
+        if now - self.last_accepted < self.min_interval:
+            self.dropped += 1
+            FRAMES_DROPPED.inc()
+            return False
+        self.last_accepted = now
+
+        if self.service is not None:
+            if len(self.pending) >= self.queue_size:
+                self.pending.popleft()
+                self.dropped += 1
+                FRAMES_DROPPED.inc()
+                FRAME_QUEUE_DEPTH.dec()
+            self.pending.append(payload)
+            FRAME_QUEUE_DEPTH.inc()
+            self.service.notify(self)
+            return True
+
+        if self.queue.full():
+            # Drop the oldest frame; only the most recent one is worth analysing
+            self.queue.get_nowait()
+            self.dropped += 1
+            FRAMES_DROPPED.inc()
+            FRAME_QUEUE_DEPTH.dec()
+        self.queue.put_nowait(payload)
+        FRAME_QUEUE_DEPTH.inc()
+        return True
+
+    def _analyze(self, payload) -> dict:
+        with FRAME_DECODE.time():
+            frame = decode_frame(payload)
+        if frame is None:
+            return {"error": "Invalid frame data"}
+        with FRAME_DETECT.time():
+            return self.detector.detect_fraud(frame)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            payload = await self.queue.get()
+            FRAME_QUEUE_DEPTH.dec()
+            try:
+                result = await loop.run_in_executor(get_executor(), self._analyze, payload)
+                await self.on_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Frame analysis error: {e}")
+
+
+class FrameAnalysisService:
+    """
+    Analyses frames from all sessions in micro-batches: a batch closes at max_batch frames or
+    max_wait_ms after it opened, and is split into one chunk per worker so each thread-pool
+    dispatch covers several frames. Sessions are served round-robin with at most one frame in
+    flight each, so a client sending more frames only overflows its own small queue.
+    """
+    def __init__(self, max_batch: int = FRAME_BATCH_SIZE, max_wait_ms: float = FRAME_BATCH_WAIT_MS, workers: int = FRAME_WORKERS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.ready = deque()  # pipelines with a pending frame and nothing in flight
+        self.wakeup = None
+        self.slots = None
+        self.task = None
+        self.background = set()
+
+    async def start(self):
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            # Chunks beyond one per worker would only wait in the executor queue, where frames can't be dropped
+            self.slots = asyncio.Semaphore(self.workers)
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = list(self.background) + ([self.task] if self.task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self.background.clear()
+
+    def notify(self, pipeline: FramePipeline):
+        if pipeline.in_flight or pipeline.scheduled or pipeline.closed:
+            return
+        pipeline.scheduled = True
+        self.ready.append(pipeline)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    def _take_batch(self) -> list:
+        batch = []
+        while self.ready and len(batch) < self.max_batch:
+            pipeline = self.ready.popleft()
+            pipeline.scheduled = False
+            if pipeline.closed or not pipeline.pending:
+                continue
+            FRAME_QUEUE_DEPTH.dec()
+            pipeline.in_flight = True
+            batch.append((pipeline, pipeline.pending.popleft()))
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self.ready:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+            # Let frames from other sessions join until the batch is full or the wait is over
+            deadline = loop.time() + self.max_wait
+            while len(self.ready) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if not batch:
+                continue
+            FRAME_BATCH.observe(len(batch))
+            chunk_count = min(self.workers, len(batch))
+            for index in range(chunk_count):
+                await self.slots.acquire()
+                self._spawn(self._process(loop, batch[index::chunk_count]))
+
+    async def _process(self, loop, chunk: list):
+        try:
+            results = await loop.run_in_executor(get_executor(), _analyze_chunk, chunk)
+        except Exception as e:
+            print(f"Frame analysis error: {e}")
+            results = [{"error": "Frame analysis failed"}] * len(chunk)
+        finally:
+            self.slots.release()
+        for (pipeline, _), result in zip(chunk, results):
+            self._spawn(self._deliver(pipeline, result))
+
+    async def _deliver(self, pipeline: FramePipeline, result: dict):
+        # Each session gets its result on its own task, so a slow socket only holds up that session
+        try:
+            if not pipeline.closed:
+                await pipeline.on_result(result)
+        except Exception as e:
+            print(f"Frame result delivery error: {e}")
+        finally:
+            pipeline.in_flight = False
+            if pipeline.pending:
+                self.notify(pipeline)
+
+
+def _analyze_chunk(chunk: list) -> list:
+    results = []
+    for pipeline, payload in chunk:
+        try:
+            results.append(pipeline._analyze(payload))
+        except Exception as e:
+            print(f"Frame analysis error: {e}")
+            results.append({"error": "Frame analysis failed"})
+    return results
@@ -1,10 +1,43 @@
-import cv2
-import numpy as np
+import os
+import time
+import threading
+from collections import deque
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+
+CASCADE_FILE = 'haarcascade_frontalface_default.xml'
+
+# Tracking mode tuning
+FULL_SCAN_INTERVAL = int(os.getenv("FRAUD_FULL_SCAN_INTERVAL", "10"))
+ROI_MARGIN = float(os.getenv("FRAUD_ROI_MARGIN", "0.5"))
+ALERT_WINDOW_SECONDS = float(os.getenv("FRAUD_ALERT_WINDOW", "3"))
+ALERT_RATIO = float(os.getenv("FRAUD_ALERT_RATIO", "0.6"))
+ALERT_MIN_SAMPLES = int(os.getenv("FRAUD_ALERT_MIN_SAMPLES", "3"))
+ALERT_COOLDOWN_SECONDS = float(os.getenv("FRAUD_ALERT_COOLDOWN", "5"))
 
 class FraudDetector:
     def __init__(self):
-        # Initialize OpenCV face detector
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # One OpenCV face detector per thread, since frames are analysed on a worker pool.
+        # Each is loaded on first use in its thread (warm_up() preloads them)
+        self._local = threading.local()
+
+    @property
+    def face_cascade(self):
+        cascade = getattr(self._local, "face_cascade", None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(cv2.data.haarcascades + CASCADE_FILE)
+            self._local.face_cascade = cascade
+        return cascade
+
+    def detect_faces(self, gray, min_size=None, max_size=None):
+        kwargs = {}
+        if min_size:
+            kwargs["minSize"] = min_size
+        if max_size:
+            kwargs["maxSize"] = max_size
+        return self.face_cascade.detectMultiScale(gray, 1.1, 4, **kwargs)
 
     def detect_fraud(self, frame_data):
         """
@@ -17,7 +50,7 @@ class FraudDetector:
              return {"error": "Invalid frame data"}
 
         gray = cv2.cvtColor(frame_data, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = self.detect_faces(gray)
         
         alerts = []
         if len(faces) == 0:
@@ -35,3 +68,92 @@ class FraudDetector:
             "alerts": alerts,
             "face_count": len(faces)
         }
+
+
+class FaceTracker:
+    """
+    Stateful per-session wrapper around FraudDetector.
+    Runs the full cascade scan every FULL_SCAN_INTERVAL frames (or when tracking is lost) and
+    otherwise searches only a region around the last face box. Alerts are smoothed over a time window.
+    """
+    def __init__(self, detector: FraudDetector, full_scan_interval: int = FULL_SCAN_INTERVAL):
+        self.detector = detector
+        self.full_scan_interval = full_scan_interval
+        self.last_box = None
+        self.frames_since_scan = 0
+        self.observations = deque()  # (timestamp, face_count)
+        self.last_alert = {}  # alert text -> time it was last reported
+
+    def _full_scan(self, gray):
+        self.frames_since_scan = 0
+        faces = self.detector.detect_faces(gray)
+        self.last_box = tuple(faces[0]) if len(faces) == 1 else None
+        return len(faces)
+
+    def _roi_search(self, gray) -> bool:
+        x, y, w, h = self.last_box
+        frame_h, frame_w = gray.shape[:2]
+        mx, my = int(w * ROI_MARGIN), int(h * ROI_MARGIN)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+
+        roi = gray[y0:y1, x0:x1]
+        faces = self.detector.detect_faces(
+            roi,
+            min_size=(int(w * 0.7), int(h * 0.7)),
+            max_size=(int(w * 1.5), int(h * 1.5)),
+        )
+        if len(faces) != 1:
+            return False
+        fx, fy, fw, fh = faces[0]
+        self.last_box = (x0 + fx, y0 + fy, fw, fh)
+        return True
+
+    def _smoothed_alerts(self, now: float) -> list:
+        while self.observations and now - self.observations[0][0] > ALERT_WINDOW_SECONDS:
+            self.observations.popleft()
+        total = len(self.observations)
+        if total < ALERT_MIN_SAMPLES:
+            return []
+
+        no_face = sum(1 for _, count in self.observations if count == 0)
+        multiple = sum(1 for _, count in self.observations if count > 1)
+        candidates = []
+        if no_face / total >= ALERT_RATIO:
+            candidates.append("No face detected")
+        if multiple / total >= ALERT_RATIO:
+            candidates.append("Multiple faces detected")
+
+        alerts = []
+        for alert in candidates:
+            if now - self.last_alert.get(alert, float("-inf")) >= ALERT_COOLDOWN_SECONDS:
+                self.last_alert[alert] = now
+                alerts.append(alert)
+        return alerts
+
+    def detect_fraud(self, frame_data):
+        """
+        Same contract as FraudDetector.detect_fraud, but only reports sustained anomalies.
+        """
+        if frame_data is None or frame_data.size == 0:
+             return {"error": "Invalid frame data"}
+
+        gray = cv2.cvtColor(frame_data, cv2.COLOR_BGR2GRAY)
+        self.frames_since_scan += 1
+        if self.last_box is not None and self.frames_since_scan < self.full_scan_interval and self._roi_search(gray):
+            face_count = 1
+            full_scan = False
+        else:
+            face_count = self._full_scan(gray)
+            full_scan = True
+
+        now = time.monotonic()
+        self.observations.append((now, face_count))
+        alerts = self._smoothed_alerts(now)
+
+        return {
+            "is_suspicious": len(alerts) > 0,
+            "alerts": alerts,
+            "face_count": face_count,
+            "full_scan": full_scan
+        }
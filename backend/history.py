@@ -0,0 +1,64 @@
+import os
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "4"))
+HISTORY_SUMMARY_WORDS = int(os.getenv("HISTORY_SUMMARY_WORDS", "20"))
+
+ROLE_LABELS = {"agent": "Q", "candidate": "A"}
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough rule of thumb for English text with Llama-style tokenizers
+    return max(1, len(text) // 4)
+
+
+def truncate_words(text: str, max_words: int) -> str:
+    words = text.split()
+    if len(words) <= max_words:
+        return " ".join(words)
+    return " ".join(words[:max_words]) + " ..."
+
+
+class HistoryManager:
+    """
+    Renders the interview transcript for prompts within a fixed token budget.
+    The most recent turns are kept verbatim, older ones are cut to a short summary,
+    and whatever still does not fit is dropped oldest-first.
+    """
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, recent_turns: int = HISTORY_RECENT_TURNS,
+                 summary_words: int = HISTORY_SUMMARY_WORDS):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summary_words = summary_words
+
+    def render(self, turns: list) -> str:
+        if not turns:
+            return "(no previous turns)"
+
+        lines = []
+        used = 8  # reserve room for the "earlier turns omitted" marker and newlines
+        omitted = 0
+        for age, turn in enumerate(reversed(turns)):
+            label = ROLE_LABELS.get(turn.get("role"), turn.get("role", "?"))
+            content = " ".join(str(turn.get("content", "")).split())
+            if age >= self.recent_turns:
+                content = truncate_words(content, self.summary_words)
+            line = f"{label}: {content}"
+            cost = estimate_tokens(line)
+
+            remaining = self.token_budget - used
+            if cost > remaining:
+                # Squeeze in a cut-down version if there is meaningful room left
+                max_chars = remaining * 4 - len(label) - 6
+                if max_chars >= 40:
+                    lines.append(f"{label}: {content[:max_chars]} ...")
+                    omitted = len(turns) - age - 1
+                else:
+                    omitted = len(turns) - age
+                break
+            lines.append(line)
+            used += cost
+
+        if omitted:
+            lines.append(f"({omitted} earlier turns omitted)")
+        return "\n".join(reversed(lines))
@@ -0,0 +1,60 @@
+"""
+Deferred imports for the heavy modules (numpy, OpenCV, pypdf, the Groq SDK).
+lazy_import returns a stand-in that imports the real module on first attribute access, so
+importing main stays fast; warmup.warm_up() then pays the cost before traffic arrives.
+Set LAZY_IMPORTS=false to import everything eagerly (e.g. to compare startup times).
+"""
+import os
+import sys
+import importlib
+import importlib.util
+import threading
+
+LAZY_IMPORTS = os.getenv("LAZY_IMPORTS", "true").lower() == "true"
+
+_lazy_modules = {}
+_lazy_modules_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access. The import runs for
+    real under a lock (importlib.util.LazyLoader is not thread-safe: threads touching the module
+    while another one executes it see missing attributes). Afterwards the module's namespace
+    is copied in, so later lookups cost the same as on the module itself.
+    """
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _lazy_load(self):
+        with self._lazy_lock:
+            if "_lazy_module" not in self.__dict__:
+                module = importlib.import_module(self._lazy_name)
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_lazy_module"] = module
+        return self.__dict__["_lazy_module"]
+
+    def __getattr__(self, attr: str):
+        # Only called for names not copied in yet, i.e. before the first load
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self._lazy_load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if "_lazy_module" in self.__dict__ else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_import(name: str):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if not LAZY_IMPORTS:
+        return importlib.import_module(name)
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named {name!r}")
+    with _lazy_modules_lock:
+        if name not in _lazy_modules:
+            _lazy_modules[name] = LazyModule(name)
+        return _lazy_modules[name]
@@ -0,0 +1,103 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # optional SQLite file for persistence
+
+
+def make_key(model: str, system_prompt: str, prompt: str) -> str:
+    return hashlib.sha256("\0".join((model, system_prompt, prompt)).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of LLM completions with optional SQLite persistence,
+    plus single-flight coalescing so identical concurrent requests share one call.
+    """
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL, path: str = LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.inflight = {}  # key -> asyncio.Future
+        self.sync_locks = {}  # key -> threading.Lock
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+            self.db.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self.entries.move_to_end(key)
+                    return item[1]
+                del self.entries[key]
+            if self.db is None:
+                return None
+            row = self.db.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        self._remember(key, row[0], row[1])
+        return row[0]
+
+    def put(self, key: str, value: str):
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self.db is not None:
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+                self.db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                self.db.commit()
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    async def single_flight(self, key: str, factory):
+        """
+        Awaits factory() once per key; concurrent callers with the same key share the result.
+        The call runs in a task owned by the cache, so a cancelled caller does not cancel the others.
+        """
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_flight(self, key: str, task: asyncio.Future):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved so a failure nobody waited for is not logged
+
+    def sync_lock(self, key: str) -> threading.Lock:
+        """
+        Per-key lock for the blocking client, so threads asking the same thing wait for one call.
+        """
+        with self.lock:
+            lock = self.sync_locks.get(key)
+            if lock is None:
+                lock = self.sync_locks[key] = threading.Lock()
+            return lock
+
+    def release_sync_lock(self, key: str):
+        with self.lock:
+            self.sync_locks.pop(key, None)
+
+
+llm_cache = ResponseCache() if LLM_CACHE_ENABLED else None
@@ -1,46 +1,321 @@
 import os
 import random
-from groq import Groq
+import time
+import asyncio
+import threading
+from lazy_imports import lazy_import
+from llm_cache import llm_cache, make_key
+from metrics import LLM_LATENCY, LLM_FIRST_TOKEN, LLM_PROMPT_TOKENS, LLM_COMPLETION_TOKENS, LLM_ERRORS, LLM_PENDING, trace_event
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+
+# Async client tuning (shared by every session in this worker)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+
+groq = lazy_import("groq")
+httpx = lazy_import("httpx")
+
+_http_client = None
+_async_client = None
+_sync_clients = {}
+_llm_clients = {}
+_clients_lock = threading.Lock()
+_semaphore = None
+
+
+def retryable_errors() -> tuple:
+    # Built on demand so that importing this module does not load the Groq SDK
+    return (groq.APIConnectionError, groq.APITimeoutError, groq.RateLimitError, groq.InternalServerError)
+
+
+def get_sync_client(api_key: str):
+    """
+    Returns the process-wide blocking Groq client for this API key.
+    """
+    client = _sync_clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _sync_clients.get(api_key)
+            if client is None:
+                client = _sync_clients[api_key] = groq.Groq(api_key=api_key)
+    return client
+
+
+def get_llm_client(provider: str = "groq", model: str = DEFAULT_MODEL) -> "LLMClient":
+    """
+    Returns the LLMClient shared by all agents for this provider and model.
+    """
+    key = (provider, model)
+    client = _llm_clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _llm_clients.get(key)
+            if client is None:
+                client = _llm_clients[key] = LLMClient(provider, model)
+    return client
+
+
+def get_async_client(api_key: str):
+    """
+    Returns the process-wide AsyncGroq client backed by one pooled httpx client.
+    """
+    global _http_client, _async_client
+    if _async_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT),
+        )
+        # Retries are handled in acompletion so backoff stays configurable here
+        _async_client = groq.AsyncGroq(api_key=api_key, http_client=_http_client, max_retries=0)
+    return _async_client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_async_client():
+    """
+    Closes the shared pooled connection (call on application shutdown).
+    """
+    global _http_client, _async_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _async_client = None
+
 
 class LLMClient:
-    def __init__(self, provider="groq"):
+    def __init__(self, provider="groq", model: str = DEFAULT_MODEL):
         self.provider = provider
+        self.model = model
         self.api_key = os.getenv("GROQ_API_KEY")
-        if self.api_key:
-            self.client = Groq(api_key=self.api_key)
-        else:
-            self.client = None
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use and shared across LLMClient instances
+        if self._client is None and self.api_key:
+            self._client = get_sync_client(self.api_key)
+        return self._client
+
+    def _messages(self, prompt: str, system_prompt: str) -> list:
+        return [
+            {
+                "role": "system",
+                "content": system_prompt,
+            },
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ]
+
+    def _cache_key(self, prompt: str, system_prompt: str):
+        return make_key(self.model, system_prompt, prompt) if llm_cache is not None else None
 
-    def completion(self, prompt: str, system_prompt: str = "You are a helpful AI assistant.") -> str:
+    def _cache_put(self, key, content: str):
+        # Only real completions are cached, never the offline fallback
+        if key is not None and content:
+            llm_cache.put(key, content)
+
+    def _observe(self, operation: str, start: float, cached: bool):
+        elapsed = time.perf_counter() - start
+        LLM_LATENCY.observe(elapsed, operation=operation, cached=str(cached).lower())
+        trace_event(f"llm.{operation}", elapsed)
+
+    def _record_usage(self, operation: str, usage):
+        if usage is not None:
+            LLM_PROMPT_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, operation=operation)
+            LLM_COMPLETION_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, operation=operation)
+
+    def _fallback(self, prompt: str, operation: str) -> str:
+        LLM_ERRORS.inc(operation=operation)
+        return self._mock_fallback(prompt)
+
+    def completion(self, prompt: str, system_prompt: str = "You are a helpful AI assistant.", operation: str = "completion") -> str:
         """
         Generates a completion from the LLM using Groq.
+        Identical requests are served from the response cache; threads asking the same thing share one call.
         """
+        start = time.perf_counter()
+        key = self._cache_key(prompt, system_prompt)
+        if key is None:
+            content = self._completion_uncached(prompt, system_prompt, None, operation)
+            self._observe(operation, start, cached=False)
+            return content
+        cached = llm_cache.get(key)
+        if cached is not None:
+            self._observe(operation, start, cached=True)
+            return cached
+        with llm_cache.sync_lock(key):
+            cached = llm_cache.get(key)
+            if cached is not None:
+                self._observe(operation, start, cached=True)
+                return cached
+            try:
+                content = self._completion_uncached(prompt, system_prompt, key, operation)
+                self._observe(operation, start, cached=False)
+                return content
+            finally:
+                llm_cache.release_sync_lock(key)
+
+    def _completion_uncached(self, prompt: str, system_prompt: str, key, operation: str) -> str:
         if self.client:
             try:
                 chat_completion = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt,
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt,
-                        }
-                    ],
-                    model="llama-3.3-70b-versatile",
+                    messages=self._messages(prompt, system_prompt),
+                    model=self.model,
                 )
-                return chat_completion.choices[0].message.content
+                content = chat_completion.choices[0].message.content
+                self._record_usage(operation, getattr(chat_completion, "usage", None))
+                self._cache_put(key, content)
+                return content
             except Exception as e:
                 print(f"!!! LLM CRITICAL ERROR !!!")
                 print(f"Error Type: {type(e)}")
                 print(f"Error Message: {e}")
                 import traceback
                 traceback.print_exc()
-                return self._mock_fallback(prompt)
+                return self._fallback(prompt, operation)
         else:
             print("!!! LLM ERROR: Client is None (API Key missing or invalid) !!!")
-            return self._mock_fallback(prompt)
+            return self._fallback(prompt, operation)
+
+    async def acompletion(self, prompt: str, system_prompt: str = "You are a helpful AI assistant.", operation: str = "completion") -> str:
+        """
+        Non-blocking completion on the shared pooled client.
+        Concurrency is capped per worker and transient errors are retried with exponential backoff.
+        Cached responses are returned directly and concurrent identical requests are coalesced.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(prompt, system_prompt)
+        if key is None:
+            content = await self._acompletion_uncached(prompt, system_prompt, None, operation)
+            self._observe(operation, start, cached=False)
+            return content
+        cached = llm_cache.get(key)
+        if cached is not None:
+            self._observe(operation, start, cached=True)
+            return cached
+        content = await llm_cache.single_flight(key, lambda: self._acompletion_uncached(prompt, system_prompt, key, operation))
+        self._observe(operation, start, cached=False)
+        return content
+
+    async def _acompletion_uncached(self, prompt: str, system_prompt: str, key, operation: str) -> str:
+        if not self.api_key:
+            print("!!! LLM ERROR: Client is None (API Key missing or invalid) !!!")
+            return self._fallback(prompt, operation)
+
+        client = get_async_client(self.api_key)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                LLM_PENDING.inc()
+                try:
+                    async with _get_semaphore():
+                        chat_completion = await client.chat.completions.create(
+                            messages=self._messages(prompt, system_prompt),
+                            model=self.model,
+                        )
+                finally:
+                    LLM_PENDING.dec()
+                content = chat_completion.choices[0].message.content
+                self._record_usage(operation, getattr(chat_completion, "usage", None))
+                self._cache_put(key, content)
+                return content
+            except retryable_errors() as e:
+                if attempt == LLM_MAX_RETRIES:
+                    print(f"!!! LLM ERROR: giving up after {attempt + 1} attempts: {e}")
+                    return self._fallback(prompt, operation)
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, LLM_BACKOFF_BASE)
+                print(f"LLM transient error ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"!!! LLM CRITICAL ERROR !!!")
+                print(f"Error Type: {type(e)}")
+                print(f"Error Message: {e}")
+                import traceback
+                traceback.print_exc()
+                return self._fallback(prompt, operation)
+
+    async def astream(self, prompt: str, system_prompt: str = "You are a helpful AI assistant.", operation: str = "completion"):
+        """
+        Streams completion text deltas as they arrive.
+        Transient errors are retried only before the first token; the mock fallback is yielded as one chunk.
+        A cached response is yielded as a single chunk, and a completed stream is added to the cache.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(prompt, system_prompt)
+        if key is not None:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                self._observe(operation, start, cached=True)
+                yield cached
+                return
+
+        if not self.api_key:
+            print("!!! LLM ERROR: Client is None (API Key missing or invalid) !!!")
+            yield self._fallback(prompt, operation)
+            return
+
+        client = get_async_client(self.api_key)
+        started = False
+        parts = []
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                LLM_PENDING.inc()
+                try:
+                    async with _get_semaphore():
+                        stream = await client.chat.completions.create(
+                            messages=self._messages(prompt, system_prompt),
+                            model=self.model,
+                            stream=True,
+                        )
+                        async for chunk in stream:
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                if not started:
+                                    LLM_FIRST_TOKEN.observe(time.perf_counter() - start, operation=operation)
+                                started = True
+                                parts.append(delta)
+                                yield delta
+                            # Groq reports usage on the final chunk of a stream
+                            self._record_usage(operation, getattr(getattr(chunk, "x_groq", None), "usage", None))
+                finally:
+                    LLM_PENDING.dec()
+                self._cache_put(key, "".join(parts))
+                self._observe(operation, start, cached=False)
+                return
+            except retryable_errors() as e:
+                if started:
+                    print(f"!!! LLM ERROR: stream interrupted: {e}")
+                    return
+                if attempt == LLM_MAX_RETRIES:
+                    print(f"!!! LLM ERROR: giving up after {attempt + 1} attempts: {e}")
+                    yield self._fallback(prompt, operation)
+                    return
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, LLM_BACKOFF_BASE)
+                print(f"LLM transient error ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"!!! LLM CRITICAL ERROR !!!")
+                print(f"Error Type: {type(e)}")
+                print(f"Error Message: {e}")
+                import traceback
+                traceback.print_exc()
+                if not started:
+                    yield self._fallback(prompt, operation)
+                return
 
     def _mock_fallback(self, prompt: str) -> str:
         """
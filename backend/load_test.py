@@ -0,0 +1,272 @@
+"""
+Synthetic load test for the interview backend. It drives N concurrent interviews over
+/ws/interview/{client_id}, with binary video frames and optional CV uploads.
+
+    # start the fake LLM and the backend, run 50 interviews, then shut both down
+    python load_test.py --spawn --sessions 50 --fps 5 --upload-cv
+
+    # or against servers you started yourself
+    python load_test.py --server http://127.0.0.1:8000 --sessions 50
+
+Reports p50/p99 question latency (answer sent -> full question), time to first question chunk,
+frames analysed per second and server CPU seconds per session (read from /metrics).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+import cv2
+import httpx
+import websockets
+
+from frame_pipeline import BINARY_HEADER, MSG_VIDEO_FRAME, FORMAT_JPEG
+
+SAMPLE_ANSWERS = [
+    "I would start by profiling the hot path, then cache the expensive lookups and measure again.",
+    "A hash map gives average constant time lookups by hashing keys into buckets; collisions are chained.",
+    "In my last project I moved blocking calls off the event loop into a worker pool to keep latency flat.",
+    "I write unit tests for the core logic and a few integration tests around the external services.",
+]
+
+
+def make_cv_pdf(name: str) -> bytes:
+    """
+    Builds a minimal one-page PDF with extractable text, so uploads need no fixture files.
+    """
+    text = f"{name} - Senior Python Developer. Skills: Python, FastAPI, PostgreSQL, Docker, AWS, React."
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def make_frames(count: int = 8, width: int = 640, height: int = 480) -> list:
+    """
+    Pre-encoded JPEG frames (a bright ellipse on noise, roughly face-sized) reused by every session.
+    """
+    frames = []
+    rng = np.random.default_rng(0)
+    for _ in range(count):
+        image = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        cv2.ellipse(image, (width // 2, height // 2), (90, 120), 0, 0, 360, (180, 190, 210), -1)
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        frames.append(encoded.tobytes())
+    return frames
+
+
+def percentile(values: list, pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else float("nan")
+
+
+def parse_metrics(text: str) -> dict:
+    values = {}
+    for line in text.splitlines():
+        if line.startswith("#") or " " not in line:
+            continue
+        name, value = line.rsplit(" ", 1)
+        try:
+            values[name] = float(value)
+        except ValueError:
+            pass
+    return values
+
+
+class Results:
+    def __init__(self):
+        self.question_latencies = []
+        self.first_chunk_latencies = []
+        self.upload_latencies = []
+        self.frames_sent = 0
+        self.completed = 0
+        self.errors = []
+
+
+async def send_frames(ws, frames: list, fps: float, results: Results):
+    sequence = 0
+    interval = 1.0 / fps
+    while True:
+        frame = frames[sequence % len(frames)]
+        await ws.send(BINARY_HEADER.pack(MSG_VIDEO_FRAME, FORMAT_JPEG, sequence) + frame)
+        results.frames_sent += 1
+        sequence += 1
+        await asyncio.sleep(interval)
+
+
+async def run_interview(index: int, args, frames: list, results: Results, http: httpx.AsyncClient):
+    client_id = f"load-{os.getpid()}-{index}-{random.getrandbits(32):x}"
+    name = f"Candidate {index}"
+    payload = {"name": name, "email": f"candidate{index}@example.com", "cv_text": ""}
+
+    if args.upload_cv:
+        started = time.perf_counter()
+        response = await http.post(f"{args.server}/upload-cv", files={"file": (f"cv_{index}.pdf", make_cv_pdf(name), "application/pdf")})
+        response.raise_for_status()
+        results.upload_latencies.append(time.perf_counter() - started)
+        payload["cv_id"] = response.json()["cv_id"]
+
+    ws_url = args.server.replace("http", "ws", 1) + f"/ws/interview/{client_id}"
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        frame_task = asyncio.create_task(send_frames(ws, frames, args.fps, results)) if args.fps > 0 else None
+        try:
+            sent_at = time.perf_counter()
+            await ws.send(json.dumps({"type": "init", "payload": payload}))
+            first_chunk_seen = False
+            while True:
+                message = json.loads(await ws.recv())
+                if message["type"] == "question_chunk" and not first_chunk_seen:
+                    first_chunk_seen = True
+                    results.first_chunk_latencies.append(time.perf_counter() - sent_at)
+                elif message["type"] == "question":
+                    results.question_latencies.append(time.perf_counter() - sent_at)
+                    await asyncio.sleep(args.think_time)
+                    sent_at = time.perf_counter()
+                    first_chunk_seen = False
+                    await ws.send(json.dumps({"type": "answer", "payload": random.choice(SAMPLE_ANSWERS)}))
+                elif message["type"] == "interview_end":
+                    results.completed += 1
+                    return
+        finally:
+            if frame_task:
+                frame_task.cancel()
+
+
+async def fetch_metrics(http: httpx.AsyncClient, server: str) -> dict:
+    try:
+        response = await http.get(f"{server}/metrics")
+        return parse_metrics(response.text)
+    except httpx.HTTPError:
+        return {}
+
+
+async def run(args) -> Results:
+    frames = make_frames()
+    results = Results()
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=args.sessions)) as http:
+        before = await fetch_metrics(http, args.server)
+        started = time.perf_counter()
+
+        semaphore = asyncio.Semaphore(args.sessions)
+
+        async def guarded(index):
+            async with semaphore:
+                await asyncio.sleep(random.uniform(0, args.ramp_up))
+                try:
+                    await run_interview(index, args, frames, results, http)
+                except Exception as e:
+                    results.errors.append(f"session {index}: {type(e).__name__}: {e}")
+
+        await asyncio.gather(*(guarded(i) for i in range(args.sessions)))
+        duration = time.perf_counter() - started
+        after = await fetch_metrics(http, args.server)
+
+    frames_analysed = after.get("frame_detect_seconds_count", 0) - before.get("frame_detect_seconds_count", 0)
+    cpu_seconds = after.get("process_cpu_seconds_total", 0) - before.get("process_cpu_seconds_total", 0)
+
+    print("\n--- Load Test Results ---")
+    print(f"Sessions: {results.completed}/{args.sessions} completed in {duration:.1f}s ({len(results.errors)} errors)")
+    print(f"Question latency:   p50 {percentile(results.question_latencies, 50) * 1000:.0f} ms   p99 {percentile(results.question_latencies, 99) * 1000:.0f} ms")
+    if results.first_chunk_latencies:
+        print(f"First chunk:        p50 {percentile(results.first_chunk_latencies, 50) * 1000:.0f} ms   p99 {percentile(results.first_chunk_latencies, 99) * 1000:.0f} ms")
+    if results.upload_latencies:
+        print(f"CV upload:          p50 {percentile(results.upload_latencies, 50) * 1000:.0f} ms   p99 {percentile(results.upload_latencies, 99) * 1000:.0f} ms")
+    print(f"Frames: {results.frames_sent} sent, {frames_analysed:.0f} analysed ({frames_analysed / duration:.1f}/s)")
+    if after:
+        print(f"Server CPU: {cpu_seconds:.2f}s total, {cpu_seconds / max(1, args.sessions) * 1000:.1f} ms per session")
+    for error in results.errors[:10]:
+        print(f"  ! {error}")
+    print("-------------------------")
+    return results
+
+
+def wait_for(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn_servers(args, scratch: str) -> list:
+    """
+    Starts the fake LLM and the backend (single uvicorn worker) as subprocesses.
+    The backend's outcome store and email outbox live in scratch, not in the real ones.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    fake = subprocess.Popen(
+        [sys.executable, "fake_llm_server.py", "--port", str(args.fake_llm_port),
+         "--latency-ms", str(args.llm_latency_ms), "--tokens-per-second", str(args.llm_tokens_per_second)],
+        cwd=here,
+    )
+    env = dict(os.environ)
+    env.update({
+        "GROQ_API_KEY": "fake-key",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{args.fake_llm_port}",
+        "SESSION_STORE": "memory",
+        "LLM_CACHE_ENABLED": "false",
+        # Without the bank every question is generated, so the fake LLM's latency is what gets measured
+        "QUESTION_BANK_ENABLED": "true" if args.question_bank else "false",
+        "OUTCOMES_DIR": os.path.join(scratch, "outcomes"),
+        "EMAIL_OUTBOX_PATH": os.path.join(scratch, "outbox.db"),
+    })
+    port = args.server.rsplit(":", 1)[-1].strip("/")
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", port, "--log-level", "warning"],
+        cwd=here, env=env, stdout=subprocess.DEVNULL,
+    )
+    wait_for(f"http://127.0.0.1:{args.fake_llm_port}/docs")
+    wait_for(f"{args.server}/")
+    return [backend, fake]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent interview load test")
+    parser.add_argument("--server", default="http://127.0.0.1:8000")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=5, help="video frames per second per session (0 to disable)")
+    parser.add_argument("--think-time", type=float, default=0.5, help="seconds between question and answer")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="spread session starts over this many seconds")
+    parser.add_argument("--upload-cv", action="store_true")
+    parser.add_argument("--spawn", action="store_true", help="start fake LLM + backend locally")
+    parser.add_argument("--question-bank", action="store_true", help="with --spawn, serve questions from the question bank too")
+    parser.add_argument("--fake-llm-port", type=int, default=8100)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as scratch:
+        processes = spawn_servers(args, scratch) if args.spawn else []
+        try:
+            asyncio.run(run(args))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
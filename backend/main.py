@@ -1,21 +1,32 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from dotenv import load_dotenv
+import copy
 import json
+import base64
+import os
+import asyncio
+import time
 
 load_dotenv()
 
-import base64
-import numpy as np
-import cv2
-import io
-import pypdf
 from typing import List, Dict
 
-from fraud_detection import FraudDetector
+from fraud_detection import FraudDetector, FaceTracker
+from frame_pipeline import FramePipeline, FrameAnalysisService, parse_binary_message, MSG_VIDEO_FRAME, MSG_AUDIO_CHUNK, AUDIO_FORMATS
 from agents import ReasoningAgent, ScoringAgent, DecisionAgent
-from reporting import ReportGenerator
+from encoders import AudioEncoder
+from audio_stream import parse_sample_rate
+from reporting import ReportGenerator, format_date
 from email_service import EmailService
+from cv_cache import cv_cache
+from session_store import create_session_store, new_state
+from pdf_extraction import pdf_service, spool_upload, PDFExtractionError, PDFTimeoutError, PDFTooLargeError
+from llm_client import close_async_client
+from warmup import warm_up
+from outcome_store import OutcomeStore, SCORE_COLUMNS, get_outcome_store
+from metrics import registry, timed, start_trace, get_trace, trace_event, PDF_EXTRACTION, WS_MESSAGE, ACTIVE_SESSIONS, STT_LATENCY
 
 app = FastAPI()
 
@@ -23,6 +34,29 @@ app = FastAPI()
 fraud_detector = FraudDetector()
 report_generator = ReportGenerator()
 email_service = EmailService()
+session_store = create_session_store()
+audio_encoder = AudioEncoder()
+
+# Score answers in the background while the next question is generated
+PIPELINED_SCORING = os.getenv("PIPELINED_SCORING", "true").lower() == "true"
+# Score answers in rolling batches of this size with one LLM call each (0 = score each answer separately)
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", "0"))
+# Stream question text to the client as question_chunk messages while it is generated
+STREAM_QUESTIONS = os.getenv("STREAM_QUESTIONS", "true").lower() == "true"
+# Track the face between periodic full cascade scans and smooth fraud alerts
+FRAUD_TRACKING = os.getenv("FRAUD_TRACKING", "true").lower() == "true"
+# Analyse video frames of all sessions in shared micro-batches instead of one task per session
+FRAME_BATCHING = os.getenv("FRAME_BATCHING", "true").lower() == "true"
+frame_service = FrameAnalysisService() if FRAME_BATCHING else None
+
+# Load heavy modules, cascades, indexes and clients at startup; blocking delays accepting connections until done
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+WARMUP_BLOCKING = os.getenv("WARMUP_BLOCKING", "false").lower() == "true"
+warmup_status = {"ready": not WARMUP, "timings": {}}
+warmup_task = None
+
+# Message types reported as metric labels (anything else is counted as "other")
+MESSAGE_TYPES = {"init", "video_frame", "answer", "audio_chunk"}
 
 origins = [
     "http://localhost:5173",
@@ -37,26 +71,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/upload-cv")
-async def upload_cv(file: UploadFile = File(...)):
+async def run_warm_up():
+    started = time.perf_counter()
+    warmup_status["timings"] = await asyncio.to_thread(warm_up, fraud_detector)
+    warmup_status["ready"] = True
+    print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+@app.on_event("startup")
+async def startup_event():
+    global warmup_task
+    if WARMUP and WARMUP_BLOCKING:
+        await run_warm_up()
+    elif WARMUP:
+        warmup_task = asyncio.create_task(run_warm_up())
+    await email_service.start()
+    if frame_service:
+        await frame_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await email_service.stop()
+    if frame_service:
+        await frame_service.stop()
+    await close_async_client()
+    pdf_service.shutdown()
+    report_generator.executor.shutdown(wait=False)
+
+async def spool_cv_upload(file: UploadFile) -> tuple:
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
-    
     try:
-        content = await file.read()
-        pdf_file = io.BytesIO(content)
-        reader = pypdf.PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        
-        return {"filename": file.filename, "text": text}
+        return await spool_upload(file)
+    except PDFTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def pdf_error_status(error: Exception) -> int:
+    if isinstance(error, PDFTimeoutError):
+        return 504
+    if isinstance(error, PDFExtractionError):
+        return 400
+    return 500
+
+@app.post("/upload-cv")
+async def upload_cv(file: UploadFile = File(...)):
+    path, cv_id = await spool_cv_upload(file)
+    try:
+        entry = cv_cache.get(cv_id)
+        if entry is None:
+            with timed(PDF_EXTRACTION):
+                text = await pdf_service.extract_text(path)
+            entry = cv_cache.store_text(cv_id, text)
+        return {"filename": file.filename, "text": entry["text"], "cv_id": entry["cv_id"], "digest": entry["digest"]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=pdf_error_status(e), detail=str(e))
+    finally:
+        os.remove(path)
+
+@app.post("/upload-cv/stream")
+async def upload_cv_stream(file: UploadFile = File(...)):
+    """
+    Same as /upload-cv, but returns NDJSON: one {"page", "text"} line per page as it is extracted,
+    then a final {"done", "cv_id", "digest"} line (or {"error"}).
+    """
+    path, cv_id = await spool_cv_upload(file)
+
+    async def page_lines():
+        try:
+            entry = cv_cache.get(cv_id)
+            if entry is None:
+                pages = []
+                started = time.perf_counter()
+                async for index, text in pdf_service.iter_pages(path):
+                    pages.append(text)
+                    yield json.dumps({"page": index, "text": text}) + "\n"
+                PDF_EXTRACTION.observe(time.perf_counter() - started)
+                entry = cv_cache.store_text(cv_id, "\n".join(pages))
+            else:
+                yield json.dumps({"page": 0, "text": entry["text"]}) + "\n"
+            yield json.dumps({"done": True, "cv_id": entry["cv_id"], "digest": entry["digest"]}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e), "status": pdf_error_status(e)}) + "\n"
+        finally:
+            os.remove(path)
+
+    return StreamingResponse(page_lines(), media_type="application/x-ndjson")
 
 @app.websocket("/ws/interview/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
+    ACTIVE_SESSIONS.inc()
+    start_trace(client_id)
     
     # Per-Session State
     reasoning_agent = ReasoningAgent()
@@ -70,97 +174,275 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     }
     
     candidate_data = {"name": "Candidate", "cv_text": ""}
-    question_count = 0
     MAX_QUESTIONS = 5
-    current_ideal_answer = ""
+    state = new_state()  # question count, current question, answers and scores (persisted per turn)
+    saved_turns = 0  # transcript turns already written to the session store
+    pending_scores = []  # scoring tasks still in flight (pipelined / batch mode)
+    unscored_answers = []  # answers waiting for the next scoring batch
+    audio_stream = None  # created on the first audio_chunk
+    audio_rejected = False  # the client was told spoken answers are unavailable
+    question_sent_at = time.time()  # for the answer latency kept in the outcome store
+    
+    def record_score(score: dict, persist: bool = True):
+        interview_scores["technical_score"].append(score.get("technical_score", 0))
+        interview_scores["communication_score"].append(score.get("communication_score", 0))
+        interview_scores["confidence_score"].append(score.get("confidence_score", 0))
+        if persist:
+            state["scores"].append(score)
+    
+    def flush_scoring_batch():
+        if unscored_answers:
+            pending_scores.append(asyncio.create_task(scoring_agent.aevaluate_batch(list(unscored_answers))))
+            unscored_answers.clear()
+    
+    async def schedule_scoring(item: dict):
+        # Score the answer using ideal answer comparison
+        if SCORING_BATCH_SIZE > 0:
+            unscored_answers.append(item)
+            if len(unscored_answers) >= SCORING_BATCH_SIZE:
+                flush_scoring_batch()
+        elif PIPELINED_SCORING:
+            pending_scores.append(asyncio.create_task(
+                scoring_agent.aevaluate(item["answer"], item["ideal_answer"])
+            ))
+        else:
+            record_score(await scoring_agent.aevaluate(item["answer"], item["ideal_answer"]))
+    
+    async def persist_turn():
+        # Only the new transcript turns and the small state dict are written, off the event loop;
+        # the snapshot keeps the write independent of later changes to the live state
+        nonlocal saved_turns
+        snapshot, new_turns = copy.deepcopy(state), reasoning_agent.history[saved_turns:]
+        saved_turns = len(reasoning_agent.history)
+        await asyncio.to_thread(session_store.save_turn, client_id, snapshot, new_turns)
+    
+    async def send_fraud_result(fraud_result: dict):
+        if fraud_result.get("is_suspicious"):
+            await websocket.send_json({
+                "type": "fraud_alert",
+                "payload": fraud_result
+            })
+    
+    session_detector = FaceTracker(fraud_detector) if FRAUD_TRACKING else fraud_detector
+    frame_pipeline = FramePipeline(session_detector, send_fraud_result, service=frame_service)
+    frame_pipeline.start()
+    
+    def observe_message(msg_type: str, started: float):
+        elapsed = time.perf_counter() - started
+        WS_MESSAGE.observe(elapsed, type=msg_type if msg_type in MESSAGE_TYPES else "other")
+        trace_event(f"ws.{msg_type}", elapsed)
+    
+    async def send_question_chunk(text: str):
+        await websocket.send_json({"type": "question_chunk", "payload": text})
+    
+    async def next_question() -> dict:
+        if STREAM_QUESTIONS:
+            return await reasoning_agent.astream_question(candidate_data, send_question_chunk)
+        return await reasoning_agent.agenerate_question(context=candidate_data)
+    
+    async def handle_answer(user_answer: str) -> bool:
+        """
+        Scores the answer and sends the next question, or ends the interview. Returns True at the end.
+        """
+        nonlocal question_sent_at
+        item = {"question": state["current_question"], "ideal_answer": state["current_ideal_answer"], "answer": user_answer,
+                "latency": round(time.time() - question_sent_at, 3)}
+        state["answers"].append(item)
+        await schedule_scoring(item)
+        
+        # Store answer in context for next question
+        reasoning_agent.process_answer(user_answer)
+        
+        if state["question_count"] < MAX_QUESTIONS:
+            q_data = await next_question()
+            next_question_text = q_data.get("question")
+            state["current_question"] = next_question_text
+            state["current_ideal_answer"] = q_data.get("ideal_answer")
+            
+            await websocket.send_json({
+                "type": "question",
+                "payload": next_question_text
+            })
+            question_sent_at = time.time()
+            state["question_count"] += 1
+            await persist_turn()
+        else:
+            # Initialize End of Interview
+            # Wait for any answers still being scored
+            flush_scoring_batch()
+            if pending_scores:
+                for result in await asyncio.gather(*pending_scores):
+                    for score in (result if isinstance(result, list) else [result]):
+                        record_score(score)
+                pending_scores.clear()
+            
+            # Average scores
+            curr_tech = sum(interview_scores["technical_score"]) / len(interview_scores["technical_score"]) if interview_scores["technical_score"] else 0
+            curr_comm = sum(interview_scores["communication_score"]) / len(interview_scores["communication_score"]) if interview_scores["communication_score"] else 0
+            curr_conf = sum(interview_scores["confidence_score"]) / len(interview_scores["confidence_score"]) if interview_scores["confidence_score"] else 0
+            
+            agg_scores = {
+                "technical_score": curr_tech,
+                "communication_score": curr_comm,
+                "confidence_score": curr_conf
+            }
+            
+            decision = decision_agent.make_decision(agg_scores)
+            state["finished"] = True
+            state["finished_at"] = time.time()
+            state["decision"] = decision
+            await persist_turn()
+            # Finished interviews are appended to a columnar store for the /analytics queries
+            outcome_store = await asyncio.to_thread(get_outcome_store)
+            if outcome_store is not None:
+                await asyncio.to_thread(outcome_store.record, state, decision)
+            report = await report_generator.agenerate_report(candidate_data, agg_scores, decision, reasoning_agent.history,
+                                                             date=format_date(state["finished_at"]))
+            
+            await websocket.send_json({
+                "type": "interview_end",
+                "payload": {
+                    "report": report,
+                    "decision": decision
+                }
+            })
+            
+            # Queue the report email; delivery happens in the outbox workers
+            email = candidate_data.get("email", "candidate@example.com")
+            await email_service.asend_email(email, "Your Interview Report", report)
+            return True
+        return False
+    
+    async def handle_audio(data, fmt: str, final: bool = False) -> bool:
+        """
+        Buffers an audio chunk; each utterance the VAD closes is transcribed and handled as an answer.
+        """
+        nonlocal audio_stream, audio_rejected
+        if state["question_count"] == 0 or state["finished"] or audio_rejected:
+            return False
+        if audio_stream is None and not await asyncio.to_thread(audio_encoder.available):
+            # Never score made-up text: the candidate has to type the answer instead
+            audio_rejected = True
+            await websocket.send_json({
+                "type": "error",
+                "payload": "Spoken answers are not available on this server. Please type your answer."
+            })
+            return False
+        if audio_stream is None:
+            audio_stream = audio_encoder.create_stream(parse_sample_rate(candidate_data.get("audio_sample_rate")))
+        try:
+            utterances = audio_stream.feed(data, fmt) if data else []
+        except ValueError as e:
+            print(f"Audio chunk rejected: {e}")
+            return False
+        if final:
+            utterances.extend(audio_stream.flush())
+        for samples in utterances:
+            try:
+                with timed(STT_LATENCY, "stt"):
+                    text = await asyncio.to_thread(audio_encoder.transcribe, samples, audio_stream.sample_rate)
+            except Exception as e:
+                # A failed utterance is dropped; the candidate can repeat or type the answer
+                print(f"Transcription failed: {type(e).__name__}: {e}")
+                await websocket.send_json({"type": "error", "payload": "Your spoken answer could not be transcribed. Please repeat or type it."})
+                continue
+            if not text:
+                continue
+            await websocket.send_json({"type": "transcript", "payload": text})
+            if await handle_answer(text):
+                return True
+        return False
     
     try:
+        # Resume an unfinished interview for this client_id (e.g. after a reconnect or on another worker)
+        session = await asyncio.to_thread(session_store.load, client_id)
+        resumed = session is not None and not session["state"].get("finished") and session["state"]["question_count"] > 0
+        if resumed:
+            candidate_data = session["candidate_data"]
+            state = session["state"]
+            reasoning_agent.history = session["history"]
+            saved_turns = len(reasoning_agent.history)
+            for score in state["scores"]:
+                record_score(score, persist=False)
+            # Answers given before the disconnect but never scored
+            for item in state["answers"][len(state["scores"]):]:
+                await schedule_scoring(item)
+            print(f"Resumed interview for {candidate_data.get('name')} at question {state['question_count']}")
+            await websocket.send_json({
+                "type": "question",
+                "payload": state["current_question"]
+            })
+            question_sent_at = time.time()
+        
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            
+            if raw.get("bytes") is not None:
+                # Binary path: header + raw JPEG/WebP bytes, passed on without base64 or copies
+                parsed = parse_binary_message(raw["bytes"])
+                if parsed and parsed[0] == MSG_VIDEO_FRAME:
+                    frame_pipeline.submit(parsed[3])
+                elif parsed and parsed[0] == MSG_AUDIO_CHUNK and parsed[1] in AUDIO_FORMATS:
+                    if await handle_audio(parsed[3], AUDIO_FORMATS[parsed[1]]):
+                        break
+                continue
+            
+            message = json.loads(raw["text"])
             msg_type = message.get("type")
+            message_started = time.perf_counter()
             
-            if msg_type == "init":
+            if msg_type == "init" and resumed:
+                # The resumed session already has its candidate data and current question
+                continue
+            
+            elif msg_type == "init":
                 # client sends candidate info and CV text
                 candidate_data = message.get("payload", {})
+                # Reuse the cached extraction if the client uploaded its CV through /upload-cv
+                cached_cv = cv_cache.get(candidate_data["cv_id"]) if candidate_data.get("cv_id") else None
+                if cached_cv:
+                    candidate_data.setdefault("cv_text", cached_cv["text"])
+                    candidate_data["cv_digest"] = cached_cv["digest"]
                 print(f"Initialized interview for {candidate_data.get('name')}")
                 
                 # Generate first question
-                q_data = reasoning_agent.generate_question(context=candidate_data)
+                q_data = await next_question()
                 first_question_text = q_data.get("question")
-                current_ideal_answer = q_data.get("ideal_answer")
+                state["current_question"] = first_question_text
+                state["current_ideal_answer"] = q_data.get("ideal_answer")
                 
                 await websocket.send_json({
                     "type": "question",
                     "payload": first_question_text
                 })
-                question_count += 1
+                question_sent_at = time.time()
+                state["question_count"] += 1
+                await asyncio.to_thread(session_store.create, client_id, candidate_data, copy.deepcopy(state))
+                await persist_turn()
                 
             elif msg_type == "video_frame":
-                # Process video for fraud/confidence (Optional for now, keeping fraud check)
-                encoded_data = message.get("payload").split(',')[1]
-                nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                fraud_result = fraud_detector.detect_fraud(frame)
-                if fraud_result["is_fraud"]:
-                     await websocket.send_json({
-                        "type": "fraud_alert",
-                        "payload": fraud_result
-                    })
+                # Legacy JSON path (base64 data URL). Fraud check runs off the event loop; stale frames are dropped
+                frame_pipeline.submit(message.get("payload"))
             
             elif msg_type == "answer":
-                user_answer = message.get("payload")
-                
-                # Score the answer using ideal answer comparison
-                score = scoring_agent.evaluate(user_answer, current_ideal_answer)
-                
-                # Aggregate scores
-                interview_scores["technical_score"].append(score.get("technical_score", 0))
-                interview_scores["communication_score"].append(score.get("communication_score", 0))
-                interview_scores["confidence_score"].append(score.get("confidence_score", 0))
-                
-                # Store answer in context for next question
-                reasoning_agent.process_answer(user_answer)
-                
-                if question_count < MAX_QUESTIONS:
-                    q_data = reasoning_agent.generate_question(context=candidate_data)
-                    next_question_text = q_data.get("question")
-                    current_ideal_answer = q_data.get("ideal_answer")
-                    
-                    await websocket.send_json({
-                        "type": "question",
-                        "payload": next_question_text
-                    })
-                    question_count += 1
-                else:
-                    # Initialize End of Interview
-                    # Average scores
-                    curr_tech = sum(interview_scores["technical_score"]) / len(interview_scores["technical_score"]) if interview_scores["technical_score"] else 0
-                    curr_comm = sum(interview_scores["communication_score"]) / len(interview_scores["communication_score"]) if interview_scores["communication_score"] else 0
-                    curr_conf = sum(interview_scores["confidence_score"]) / len(interview_scores["confidence_score"]) if interview_scores["confidence_score"] else 0
-                    
-                    agg_scores = {
-                        "technical_score": curr_tech,
-                        "communication_score": curr_comm,
-                        "confidence_score": curr_conf
-                    }
-                    
-                    decision = decision_agent.make_decision(agg_scores)
-                    report = report_generator.generate_report(candidate_data, agg_scores, decision, reasoning_agent.history)
-                    
-                    # Send Email (Simulated)
-                    email = candidate_data.get("email", "candidate@example.com")
-                    email_service.send_email(email, "Your Interview Report", report)
-                    
-                    await websocket.send_json({
-                        "type": "interview_end",
-                        "payload": {
-                            "report": report,
-                            "decision": decision
-                        }
-                    })
+                if await handle_answer(message.get("payload")):
+                    observe_message(msg_type, message_started)
                     break # Close loop
+            
+            elif msg_type == "audio_chunk":
+                # {"data": base64 audio, "format": "pcm16" | "opus", "final": bool}
+                payload = message.get("payload") or {}
+                try:
+                    data = base64.b64decode(payload.get("data") or "")
+                except ValueError:
+                    data = b""
+                if await handle_audio(data, payload.get("format", "pcm16"), payload.get("final", False)):
+                    observe_message(msg_type, message_started)
+                    break
+            
+            observe_message(msg_type, message_started)
                     
     except WebSocketDisconnect:
         print(f"Client {client_id} disconnected")
@@ -170,6 +452,72 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         import traceback
         traceback.print_exc()
 
+    finally:
+        for task in pending_scores:
+            task.cancel()
+        await frame_pipeline.stop()
+        ACTIVE_SESSIONS.dec()
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/sessions/{client_id}")
+def session_trace(client_id: str):
+    """
+    Per-session timing trace (only recorded when METRICS_SESSION_TRACES=true).
+    """
+    trace = get_trace(client_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace for this session.")
+    return trace
+
+def require_outcome_store() -> OutcomeStore:
+    outcome_store = get_outcome_store()
+    if outcome_store is None:
+        raise HTTPException(status_code=404, detail="Outcome analytics are disabled.")
+    return outcome_store
+
+@app.get("/analytics/summary")
+def analytics_summary(since: float = None):
+    """
+    Interview count, hire rate, mean scores and answer latency percentiles (since a Unix time, optional).
+    """
+    return require_outcome_store().summary(since)
+
+@app.get("/analytics/scores")
+def analytics_scores(column: str = "final_score", bins: int = 10, since: float = None):
+    if column not in SCORE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"column must be one of {', '.join(SCORE_COLUMNS)}")
+    return require_outcome_store().score_distribution(column, bins, since)
+
+@app.get("/analytics/threshold")
+def analytics_threshold(target_hire_rate: float = None, since: float = None):
+    """
+    Hire rate per threshold, plus the threshold giving target_hire_rate when one is asked for.
+    """
+    store = require_outcome_store()
+    result = {"sweep": store.threshold_sweep(since=since)}
+    if target_hire_rate is not None:
+        result["recommendation"] = store.recommend_threshold(target_hire_rate=target_hire_rate, since=since)
+    return result
+
+@app.get("/analytics/questions")
+def analytics_questions(min_answers: int = 5, limit: int = 20, since: float = None):
+    """
+    Hardest questions first, by mean answer score.
+    """
+    return require_outcome_store().question_difficulty(min_answers, limit, since)
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the startup warm-up has finished.
+    """
+    if not warmup_status["ready"]:
+        return JSONResponse({"ready": False}, status_code=503)
+    return {"ready": True, "warmup": warmup_status["timings"]}
+
 @app.get("/")
 def read_root():
     return {"message": "AI Interviewer Backend Running"}
@@ -0,0 +1,214 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+METRICS_SESSION_TRACES = os.getenv("METRICS_SESSION_TRACES", "false").lower() == "true"
+METRICS_MAX_TRACES = int(os.getenv("METRICS_MAX_TRACES", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_str(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = super().render()
+        with self.lock:
+            for key, value in self.values.items():
+                lines.append(f"{self.name}{_label_str(self.label_names, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list:
+        lines = super().render()
+        with self.lock:
+            for key, series in self.series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _label_str(self.label_names + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.label_names + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(self.label_names, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_label_str(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend([
+            "# HELP process_cpu_seconds_total Total user and system CPU time spent in seconds.",
+            "# TYPE process_cpu_seconds_total counter",
+            f"process_cpu_seconds_total {time.process_time()}",
+        ])
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+LLM_LATENCY = registry.register(Histogram("llm_request_seconds", "LLM request latency by operation.", ("operation", "cached")))
+LLM_FIRST_TOKEN = registry.register(Histogram("llm_first_token_seconds", "Time to first streamed token by operation.", ("operation",)))
+LLM_PROMPT_TOKENS = registry.register(Counter("llm_prompt_tokens_total", "Prompt tokens sent to the LLM.", ("operation",)))
+LLM_COMPLETION_TOKENS = registry.register(Counter("llm_completion_tokens_total", "Completion tokens received from the LLM.", ("operation",)))
+LLM_PENDING = registry.register(Gauge("llm_pending_requests", "LLM requests waiting for or holding a concurrency slot."))
+LLM_ERRORS = registry.register(Counter("llm_errors_total", "LLM calls that fell back after errors.", ("operation",)))
+PDF_EXTRACTION = registry.register(Histogram("pdf_extraction_seconds", "CV PDF text extraction time."))
+FRAME_DECODE = registry.register(Histogram("frame_decode_seconds", "Video frame decode and downscale time."))
+FRAME_DETECT = registry.register(Histogram("frame_detect_seconds", "Face/fraud detection time per frame."))
+FRAMES_DROPPED = registry.register(Counter("frames_dropped_total", "Video frames skipped by rate limiting or queue overflow."))
+FRAME_QUEUE_DEPTH = registry.register(Gauge("frame_queue_depth", "Frames waiting for analysis across all sessions."))
+FRAME_BATCH = registry.register(Histogram("frame_batch_size", "Frames per cross-session analysis batch.", buckets=(1, 2, 4, 8, 16, 32, 64)))
+WS_MESSAGE = registry.register(Histogram("ws_message_seconds", "WebSocket message handling time by message type.", ("type",)))
+ACTIVE_SESSIONS = registry.register(Gauge("active_sessions", "Open interview WebSocket sessions."))
+STT_LATENCY = registry.register(Histogram("stt_seconds", "Speech-to-text time per spoken answer."))
+ANSWERS_PRESCORED = registry.register(Counter("answers_prescored_total", "Answers scored without an LLM call (empty answers).", ("outcome",)))
+QUESTIONS_SERVED = registry.register(Counter("questions_served_total", "Interview questions by source (question bank or LLM generation).", ("source",)))
+
+
+class SessionTrace:
+    """
+    Ordered (stage, seconds) timings for one interview session.
+    """
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.started = time.time()
+        self.events = []
+
+    def add(self, stage: str, seconds: float):
+        self.events.append({"stage": stage, "offset": round(time.time() - self.started, 4), "seconds": round(seconds, 4)})
+
+    def to_dict(self) -> dict:
+        return {"client_id": self.client_id, "started": self.started, "events": list(self.events)}
+
+
+_current_trace = contextvars.ContextVar("session_trace", default=None)
+_traces = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def start_trace(client_id: str):
+    """
+    Starts a trace for the current task (and tasks it spawns) if session tracing is enabled.
+    """
+    if not METRICS_SESSION_TRACES:
+        return None
+    trace = SessionTrace(client_id)
+    _current_trace.set(trace)
+    with _traces_lock:
+        _traces[client_id] = trace
+        while len(_traces) > METRICS_MAX_TRACES:
+            _traces.popitem(last=False)
+    return trace
+
+
+def get_trace(client_id: str):
+    with _traces_lock:
+        trace = _traces.get(client_id)
+    return trace.to_dict() if trace else None
+
+
+def trace_event(stage: str, seconds: float):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def timed(histogram: Histogram, stage: str = None, **labels):
+    """
+    Observes the block duration on a histogram and, if a session trace is active, records it there.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        if stage:
+            trace_event(stage, elapsed)
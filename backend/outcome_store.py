@@ -0,0 +1,469 @@
+"""
+Columnar store of finished interviews for fast analytics.
+
+Each column is a raw little-endian file that only ever grows, read back through NumPy memory maps,
+so queries over hundreds of thousands of interviews are a few vectorised passes instead of
+replaying stored transcripts.
+
+    python outcome_store.py summary
+    python outcome_store.py bench --interviews 300000
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from lazy_imports import lazy_import
+from agents import HIRE_THRESHOLD
+
+try:
+    import fcntl  # serialises appends across worker processes (POSIX only)
+except ImportError:
+    fcntl = None
+
+np = lazy_import("numpy")
+
+OUTCOMES_ENABLED = os.getenv("OUTCOMES_ENABLED", "true").lower() == "true"
+OUTCOMES_DIR = os.getenv("OUTCOMES_DIR", "outcomes")
+
+INTERVIEW_COLUMNS = {
+    "timestamp": "<f8",
+    "final_score": "<f4",
+    "technical_score": "<f4",
+    "communication_score": "<f4",
+    "confidence_score": "<f4",
+    "hired": "u1",
+    "question_count": "<u2",
+}
+QUESTION_COLUMNS = {
+    "interview": "<u4",  # row in the interviews table
+    "question_id": "<u4",  # line in questions.jsonl
+    "technical_score": "u1",
+    "communication_score": "u1",
+    "confidence_score": "u1",
+    "latency": "<f4",  # seconds from question sent to answer received (NaN if unknown)
+}
+SCORE_COLUMNS = ("final_score", "technical_score", "communication_score", "confidence_score")
+# Interview index of question rows whose interview row was never written
+ORPHANED = 0xFFFFFFFF
+
+
+class ColumnTable:
+    """
+    Append-only table with one file per column. Rows are counted from the shortest column,
+    so a write interrupted halfway is ignored (and trimmed by repair()). Files are never cut below
+    that count, since readers may have those rows memory-mapped.
+    """
+    def __init__(self, directory: str, name: str, columns: dict):
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in columns.items()}
+        self.paths = {column: os.path.join(directory, f"{name}.{column}.bin") for column in columns}
+        self.mapped = (-1, {})  # (rows, maps), replaced in one assignment so threads never mix the two
+
+    def __len__(self) -> int:
+        return min(
+            (os.path.getsize(path) // self.dtypes[column].itemsize if os.path.exists(path) else 0)
+            for column, path in self.paths.items()
+        )
+
+    def repair(self):
+        rows = len(self)
+        for column, path in self.paths.items():
+            if os.path.exists(path) and os.path.getsize(path) > rows * self.dtypes[column].itemsize:
+                os.truncate(path, rows * self.dtypes[column].itemsize)
+
+    def overwrite(self, column: str, start: int, values):
+        with open(self.paths[column], "r+b") as f:
+            f.seek(start * self.dtypes[column].itemsize)
+            f.write(np.asarray(values, dtype=self.dtypes[column]).tobytes())
+
+    def append(self, values: dict):
+        for column, path in self.paths.items():
+            with open(path, "ab") as f:
+                f.write(np.asarray(values[column], dtype=self.dtypes[column]).tobytes())
+
+    def columns(self) -> dict:
+        """
+        Read-only memory maps of every column, cut to the same number of rows.
+        """
+        rows = len(self)
+        mapped_rows, maps = self.mapped
+        if rows != mapped_rows:
+            maps = {
+                column: np.memmap(path, dtype=self.dtypes[column], mode="r", shape=(rows,)) if rows else np.zeros(0, self.dtypes[column])
+                for column, path in self.paths.items()
+            }
+            self.mapped = (rows, maps)
+        return maps
+
+
+class OutcomeStore:
+    def __init__(self, directory: str = OUTCOMES_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.interviews = ColumnTable(directory, "interviews", INTERVIEW_COLUMNS)
+        self.questions = ColumnTable(directory, "questions", QUESTION_COLUMNS)
+        self.texts_path = os.path.join(directory, "questions.jsonl")
+        self.texts = []
+        self.text_ids = {}
+        self.texts_size = 0
+        self.lock = threading.Lock()
+        self.score_order = (-1, None)  # (rows, argsort of final_score) reused while nothing is appended
+        with self._locked():
+            self.interviews.repair()
+            self.questions.repair()
+            self._drop_orphans()
+
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _drop_orphans(self):
+        """
+        Question rows from an append that never wrote its interview row (crash or error) point at
+        the next interview's index. They are relabelled ORPHANED in place, so every query skips them.
+        Orphans can only sit at the end of the table, since every append runs this first.
+        """
+        committed = len(self.interviews)
+        interview = self.questions.columns()["interview"]
+        start = len(interview)
+        while start > 0:
+            chunk = np.asarray(interview[max(0, start - 1024):start])
+            alive = np.flatnonzero((chunk < committed) | (chunk == ORPHANED))
+            if len(alive):
+                start -= len(chunk) - alive[-1] - 1
+                break
+            start -= len(chunk)
+        if start < len(interview):
+            print(f"Outcome store: dropping {len(interview) - start} question rows of an unfinished append")
+            self.questions.overwrite("interview", start, [ORPHANED] * (len(interview) - start))
+
+    def _load_texts(self):
+        # Pick up question texts added by other worker processes
+        if not os.path.exists(self.texts_path) or os.path.getsize(self.texts_path) == self.texts_size:
+            return
+        with open(self.texts_path, "r", encoding="utf-8") as f:
+            f.seek(self.texts_size)
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                text = json.loads(line)
+                self.text_ids.setdefault(text, len(self.texts))
+                self.texts.append(text)
+            self.texts_size = f.tell()
+
+    def _question_ids(self, questions: list) -> list:
+        self._load_texts()
+        new_texts = []
+        for text in questions:
+            if text not in self.text_ids:
+                self.text_ids[text] = len(self.texts)
+                self.texts.append(text)
+                new_texts.append(text)
+        if new_texts:
+            with open(self.texts_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(text) + "\n" for text in new_texts))
+            self.texts_size = os.path.getsize(self.texts_path)
+        return [self.text_ids[text] for text in questions]
+
+    def append(self, interview: dict, questions: list):
+        """
+        interview: the INTERVIEW_COLUMNS values except question_count.
+        questions: {"question", "technical_score", "communication_score", "confidence_score", "latency"} per answer.
+        """
+        with self._locked():
+            self._drop_orphans()
+            index = len(self.interviews)
+            if questions:
+                self.questions.append({
+                    "interview": [index] * len(questions),
+                    "question_id": self._question_ids([q["question"] or "" for q in questions]),
+                    **{key: np.clip([q[key] for q in questions], 0, 100) for key in ("technical_score", "communication_score", "confidence_score")},
+                    "latency": [q.get("latency", float("nan")) for q in questions],
+                })
+            # The interview row is written last: question rows without it are not counted
+            self.interviews.append({**{key: [interview[key]] for key in interview}, "question_count": [len(questions)]})
+
+    def record(self, state: dict, decision: dict):
+        """
+        Appends a finished interview from the session state (see session_store.new_state).
+        """
+        answers, scores = state.get("answers", []), state.get("scores", [])
+        questions = [
+            {
+                "question": answer.get("question"),
+                "technical_score": score.get("technical_score", 0),
+                "communication_score": score.get("communication_score", 0),
+                "confidence_score": score.get("confidence_score", 0),
+                "latency": answer.get("latency", float("nan")),
+            }
+            for answer, score in zip(answers, scores)
+        ]
+        self.append({
+            "timestamp": state.get("finished_at") or time.time(),
+            "final_score": decision.get("final_score", 0),
+            "technical_score": decision.get("technical_score", 0),
+            "communication_score": decision.get("communication_score", 0),
+            "confidence_score": decision.get("confidence_score", 0),
+            "hired": decision.get("decision") == "HIRE",
+        }, questions)
+
+    # --- Analytics ---
+
+    def _interview_mask(self, since: float = None):
+        columns = self.interviews.columns()
+        if since is None:
+            return columns, None
+        return columns, columns["timestamp"] >= since
+
+    def _question_rows(self, interviews: dict, interview_mask):
+        """
+        Question columns restricted to the interviews mapped in interviews (and to the mask, if any).
+        """
+        columns = self.questions.columns()
+        interview = columns["interview"]
+        # Count from the caller's maps: another thread may have remapped the table since
+        committed = interview < len(interviews["hired"])
+        if interview_mask is not None:
+            # Uncommitted rows point past the mask; clamp them and rely on committed to drop them
+            committed &= interview_mask[np.minimum(interview, len(interview_mask) - 1)] if len(interview_mask) else False
+        elif committed.all():
+            committed = slice(None)  # a view instead of copying every column
+        return columns, committed
+
+    def summary(self, since: float = None) -> dict:
+        columns, mask = self._interview_mask(since)
+        final = columns["final_score"] if mask is None else columns["final_score"][mask]
+        hired = columns["hired"] if mask is None else columns["hired"][mask]
+        questions, committed = self._question_rows(columns, mask)
+        latency = questions["latency"][committed]
+        result = {"interviews": int(len(final)), "questions": int(len(latency))}
+        latency = latency[~np.isnan(latency)]
+        if len(final):
+            result.update({
+                "hire_rate": float(hired.mean()),
+                "mean_scores": {key: float((columns[key] if mask is None else columns[key][mask]).mean()) for key in SCORE_COLUMNS},
+            })
+        if len(latency):
+            result["answer_latency"] = {f"p{p}": float(v) for p, v in zip((50, 90, 99), np.percentile(latency, (50, 90, 99)))}
+        return result
+
+    def score_distribution(self, column: str = "final_score", bins: int = 10, since: float = None) -> dict:
+        if column not in SCORE_COLUMNS:
+            raise ValueError(f"column must be one of {', '.join(SCORE_COLUMNS)}")
+        columns, mask = self._interview_mask(since)
+        values = np.asarray(columns[column] if mask is None else columns[column][mask], dtype=np.float64)
+        counts, edges = np.histogram(values, bins=bins, range=(0, 100))
+        result = {"column": column, "count": int(len(values)), "bins": edges.tolist(), "counts": counts.tolist()}
+        if len(values):
+            result.update({
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "percentiles": {f"p{p}": float(v) for p, v in zip((10, 25, 50, 75, 90), np.percentile(values, (10, 25, 50, 75, 90)))},
+            })
+        return result
+
+    def threshold_sweep(self, thresholds=None, labels=None, since: float = None) -> dict:
+        """
+        Hire rate for each threshold (DecisionAgent hires when final_score > threshold). With labels
+        (one bool per interview, e.g. later on-the-job success) also precision, recall and accuracy.
+        """
+        thresholds = np.arange(0, 100.5, 0.5) if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+        columns, mask = self._interview_mask(since)
+        scores = np.asarray(columns["final_score"] if mask is None else columns["final_score"][mask], dtype=np.float64)
+        total = len(scores)
+        cached_rows, order = self.score_order  # read once: another thread may replace it
+        if mask is not None or cached_rows != total:
+            order = np.argsort(scores, kind="stable")
+            if mask is None:
+                self.score_order = (total, order)
+        sorted_scores = scores[order]
+        # Interviews at or below each threshold; the rest are hires
+        below = np.searchsorted(sorted_scores, thresholds, side="right")
+        hires = total - below
+        result = {"thresholds": thresholds.tolist(), "hire_rate": (hires / total if total else np.zeros(len(thresholds))).tolist()}
+        if labels is not None and total:
+            labels = np.asarray(labels, dtype=bool)
+            labels = labels if mask is None else labels[mask]
+            cumulative = np.concatenate(([0], np.cumsum(labels[order])))
+            positives = int(cumulative[-1])
+            true_positive = positives - cumulative[below]
+            false_positive = hires - true_positive
+            true_negative = below - (positives - true_positive)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result["precision"] = np.nan_to_num(true_positive / hires).tolist()
+                result["recall"] = np.nan_to_num(true_positive / positives).tolist()
+            result["accuracy"] = ((true_positive + true_negative) / total).tolist()
+            result["false_positive"] = false_positive.tolist()
+        return result
+
+    def recommend_threshold(self, target_hire_rate: float = None, labels=None, since: float = None) -> dict:
+        """
+        Calibrates DecisionAgent's hire threshold: the most accurate one against labels if given,
+        otherwise the one giving target_hire_rate.
+        """
+        sweep = self.threshold_sweep(labels=labels, since=since)
+        thresholds = np.asarray(sweep["thresholds"])
+        hire_rate = np.asarray(sweep["hire_rate"])
+        result = {
+            "current_threshold": HIRE_THRESHOLD,
+            "current_hire_rate": self.threshold_sweep([HIRE_THRESHOLD], since=since)["hire_rate"][0],
+        }
+        if "accuracy" in sweep:
+            best = int(np.argmax(sweep["accuracy"]))
+            result.update({"threshold": float(thresholds[best]), "accuracy": sweep["accuracy"][best],
+                           "precision": sweep["precision"][best], "recall": sweep["recall"][best]})
+        elif target_hire_rate is not None:
+            best = int(np.argmin(np.abs(hire_rate - target_hire_rate)))
+            result["threshold"] = float(thresholds[best])
+        else:
+            raise ValueError("Give labels or target_hire_rate")
+        result["hire_rate"] = float(hire_rate[best])
+        return result
+
+    def question_difficulty(self, min_answers: int = 5, limit: int = 20, since: float = None) -> list:
+        """
+        Per question: answer count, mean and spread of the average score, and the hire rate of the
+        interviews it appeared in. Hardest (lowest mean score) first.
+        """
+        interviews, mask = self._interview_mask(since)
+        questions, committed = self._question_rows(interviews, mask)
+        question_id = questions["question_id"][committed].astype(np.int64)
+        if not len(question_id):
+            return []
+        combined = (questions["technical_score"][committed].astype(np.float64)
+                    + questions["communication_score"][committed]
+                    + questions["confidence_score"][committed]) / 3
+        hired = interviews["hired"][questions["interview"][committed]].astype(np.float64)
+
+        size = int(question_id.max()) + 1
+        counts = np.bincount(question_id, minlength=size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.bincount(question_id, weights=combined, minlength=size) / counts
+            spread = np.sqrt(np.maximum(np.bincount(question_id, weights=combined * combined, minlength=size) / counts - mean * mean, 0))
+            hire_rate = np.bincount(question_id, weights=hired, minlength=size) / counts
+
+        eligible = np.flatnonzero(counts >= min_answers)
+        hardest = eligible[np.argsort(mean[eligible], kind="stable")][:limit]
+        with self.lock:
+            self._load_texts()
+            texts = list(self.texts)
+        return [
+            {
+                "question": texts[i] if i < len(texts) else None,
+                "answers": int(counts[i]),
+                "mean_score": round(float(mean[i]), 2),
+                "score_std": round(float(spread[i]), 2),
+                "difficulty": round(100 - float(mean[i]), 2),
+                "hire_rate": round(float(hire_rate[i]), 3),
+            }
+            for i in hardest
+        ]
+
+
+_outcome_store = None
+_outcome_store_lock = threading.Lock()
+
+
+def get_outcome_store():
+    """
+    The shared store, opened on first use (so importing the server stays cheap); None when disabled.
+    """
+    global _outcome_store
+    if OUTCOMES_ENABLED and _outcome_store is None:
+        with _outcome_store_lock:
+            if _outcome_store is None:
+                _outcome_store = OutcomeStore()
+    return _outcome_store
+
+
+def generate_synthetic(store: OutcomeStore, interviews: int, questions_per_interview: int = 5, bank_size: int = 200, chunk: int = 10000):
+    """
+    Fills a store with random interviews in bulk (for benchmarks), bypassing per-interview appends.
+    """
+    rng = np.random.default_rng(0)
+    store._question_ids([f"Synthetic question {i}" for i in range(bank_size)])
+    difficulty = rng.uniform(-20, 20, bank_size)
+    for start in range(0, interviews, chunk):
+        count = min(chunk, interviews - start)
+        ability = rng.normal(65, 12, count)
+        question_id = rng.integers(0, bank_size, (count, questions_per_interview))
+        scores = np.clip(ability[:, None, None] - difficulty[question_id][:, :, None] + rng.normal(0, 8, (count, questions_per_interview, 3)), 0, 100)
+        means = scores.mean(axis=1)
+        final = means.mean(axis=1)
+        with store._locked():
+            offset = len(store.interviews)
+            store.questions.append({
+                "interview": np.repeat(np.arange(offset, offset + count), questions_per_interview),
+                "question_id": question_id.ravel(),
+                "technical_score": scores[:, :, 0].ravel(),
+                "communication_score": scores[:, :, 1].ravel(),
+                "confidence_score": scores[:, :, 2].ravel(),
+                "latency": rng.gamma(4, 8, count * questions_per_interview),
+            })
+            store.interviews.append({
+                "timestamp": time.time() - rng.uniform(0, 90 * 86400, count),
+                "final_score": final,
+                "technical_score": means[:, 0],
+                "communication_score": means[:, 1],
+                "confidence_score": means[:, 2],
+                "hired": final > HIRE_THRESHOLD,
+                "question_count": np.full(count, questions_per_interview),
+            })
+
+
+def main():
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Interview outcome analytics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("summary", help="print summary, score distribution and hardest questions")
+    bench_parser = subparsers.add_parser("bench", help="time the analytics on a synthetic store")
+    bench_parser.add_argument("--interviews", type=int, default=300000)
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        store = OutcomeStore()
+        print(json.dumps({
+            "summary": store.summary(),
+            "final_score": store.score_distribution(),
+            "hardest_questions": store.question_difficulty(limit=10),
+        }, indent=2))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = OutcomeStore(directory)
+        started = time.perf_counter()
+        generate_synthetic(store, args.interviews)
+        print(f"Generated {len(store.interviews)} interviews / {len(store.questions)} answers in {time.perf_counter() - started:.1f}s")
+        labels = np.random.default_rng(1).random(len(store.interviews)) < 0.3
+        queries = {
+            "summary": lambda: store.summary(),
+            "score_distribution": lambda: store.score_distribution(),
+            "recommend_threshold (hire rate)": lambda: store.recommend_threshold(target_hire_rate=0.25),
+            "recommend_threshold (labels)": lambda: store.recommend_threshold(labels=labels),
+            "question_difficulty": lambda: store.question_difficulty(),
+            "summary (last 7 days)": lambda: store.summary(since=time.time() - 7 * 86400),
+        }
+        for name, query in queries.items():
+            query()
+            started = time.perf_counter()
+            for _ in range(5):
+                query()
+            print(f"{name:<34} {(time.perf_counter() - started) / 5 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
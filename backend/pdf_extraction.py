@@ -0,0 +1,207 @@
+import os
+import asyncio
+import signal
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lazy_imports import lazy_import
+
+pypdf = lazy_import("pypdf")
+
+# PDF extraction limits
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+PDF_TASK_TIMEOUT = float(os.getenv("PDF_TASK_TIMEOUT", "10"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+# Extra wait past the timeout before a stuck worker pool is killed and replaced
+PDF_KILL_GRACE = float(os.getenv("PDF_KILL_GRACE", "2"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class PDFExtractionError(Exception):
+    pass
+
+
+class PDFTooLargeError(PDFExtractionError):
+    pass
+
+
+class PDFTimeoutError(PDFExtractionError):
+    pass
+
+
+# Worker-process functions (must be importable at module level to be picklable)
+
+class _TimeLimitExpired(BaseException):
+    # BaseException so the per-page `except Exception` in the parsing code does not swallow it
+    pass
+
+
+def _expire(signum, frame):
+    raise _TimeLimitExpired()
+
+
+def _call_with_time_limit(seconds: float, fn, *args):
+    """
+    Runs fn in the worker and interrupts it after seconds (on platforms with SIGALRM), so a
+    hostile PDF frees its worker instead of blocking the next upload.
+    """
+    if not hasattr(signal, "SIGALRM"):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn(*args)
+    except _TimeLimitExpired:
+        raise PDFTimeoutError(f"PDF extraction timed out after {seconds}s")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _init_worker():
+    # Forked workers inherit the server's signal handlers, which would make them ignore terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _count_pages(path: str) -> int:
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _load_pypdf(_) -> str:
+    return pypdf.__version__
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list:
+    reader = pypdf.PdfReader(path)
+    texts = []
+    for index in range(start, stop):
+        try:
+            texts.append(reader.pages[index].extract_text() or "")
+        except Exception as e:
+            # One broken page should not lose the rest of the CV
+            print(f"PDF page {index} extraction error: {e}")
+            texts.append("")
+    return texts
+
+
+async def spool_upload(file, max_bytes: int = PDF_MAX_BYTES) -> tuple:
+    """
+    Streams an UploadFile to a temporary file in chunks, hashing as it goes.
+    Returns (path, sha256 hex). The caller removes the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PDFTooLargeError(f"PDF exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    return tmp.name, digest.hexdigest()
+
+
+class PDFExtractionService:
+    """
+    Extracts PDF text on a process pool so parsing never runs on the event loop.
+    Pages are capped, split into small tasks with a timeout each, and yielded in order as they finish.
+    """
+    def __init__(self, workers: int = PDF_WORKERS, max_pages: int = PDF_MAX_PAGES,
+                 pages_per_task: int = PDF_PAGES_PER_TASK, task_timeout: float = PDF_TASK_TIMEOUT):
+        self.workers = workers
+        self.max_pages = max_pages
+        self.pages_per_task = pages_per_task
+        self.task_timeout = task_timeout
+        self.executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self.executor
+
+    def _submit(self, fn, *args) -> asyncio.Future:
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, _call_with_time_limit, self.task_timeout, fn, *args)
+        future.executor = executor
+        return future
+
+    async def _wait(self, future: asyncio.Future):
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.task_timeout + PDF_KILL_GRACE)
+        except asyncio.TimeoutError:
+            # The worker did not stop by itself (no SIGALRM, or stuck in native code)
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._recycle(future.executor)
+            raise PDFTimeoutError(f"PDF extraction timed out after {self.task_timeout}s")
+        except BrokenProcessPool:
+            self._recycle(future.executor)
+            raise PDFExtractionError("PDF worker stopped, please retry")
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """
+        Kills the pool's processes; the next task starts a fresh pool.
+        """
+        if self.executor is executor:
+            self.executor = None
+        print("Replacing the PDF worker pool")
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        return await self._wait(self._submit(fn, *args))
+
+    async def iter_pages(self, path: str):
+        """
+        Async generator of (page_index, text) for the first max_pages pages.
+        """
+        try:
+            page_count = await self._run(_count_pages, path)
+        except PDFExtractionError:
+            raise
+        except Exception as e:
+            raise PDFExtractionError(f"Invalid PDF: {e}")
+
+        page_count = min(page_count, self.max_pages)
+        tasks = [
+            (start, self._submit(_extract_page_range, path, start, min(start + self.pages_per_task, page_count)))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        try:
+            for start, task in tasks:
+                texts = await self._wait(task)
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+        finally:
+            for _, task in tasks:
+                task.cancel()
+
+    async def extract_text(self, path: str) -> str:
+        return "\n".join([text async for _, text in self.iter_pages(path)])
+
+    def warm_up(self):
+        """
+        Starts the worker processes and loads pypdf in them, so the first upload does not pay for it.
+        """
+        list(self._get_executor().map(_load_pypdf, range(self.workers)))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+pdf_service = PDFExtractionService()
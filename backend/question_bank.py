@@ -0,0 +1,175 @@
+"""
+Persistent bank of interview questions with a NumPy embedding index.
+
+Questions live in a JSON file ([{"question", "ideal_answer", "skills"}]); their embeddings are
+precomputed into a .npy file next to it and rebuilt whenever the JSON file or the encoder version changes.
+
+    python question_bank.py build                 # (re)compute the embedding index
+    python question_bank.py query "Skills: python, docker"
+"""
+from __future__ import annotations
+
+import os
+import json
+import random
+import threading
+
+from lazy_imports import lazy_import
+from encoders import text_encoder
+
+np = lazy_import("numpy")
+
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.json"))
+QUESTION_BANK_MIN_SCORE = float(os.getenv("QUESTION_BANK_MIN_SCORE", "0.3"))
+QUESTION_BANK_SKILL_WEIGHT = float(os.getenv("QUESTION_BANK_SKILL_WEIGHT", "0.5"))
+QUESTION_BANK_TOP_K = int(os.getenv("QUESTION_BANK_TOP_K", "3"))
+# Questions at least this similar to one already asked count as duplicates
+QUESTION_BANK_DUPLICATE_SIMILARITY = float(os.getenv("QUESTION_BANK_DUPLICATE_SIMILARITY", "0.85"))
+
+
+def _entry_text(entry: dict) -> str:
+    return f"{entry['question']} {' '.join(entry.get('skills', []))} {entry.get('ideal_answer', '')}"
+
+
+class QuestionBank:
+    def __init__(self, path: str = QUESTION_BANK_PATH, encoder=text_encoder):
+        self.path = path
+        self.encoder = encoder
+        self.lock = threading.Lock()
+        self.entries = []
+        self.vectors = np.zeros((0, encoder.dim), dtype=np.float32)
+        self.question_vectors = self.vectors
+        if path and os.path.exists(path):
+            self.load()
+
+    def _index_path(self) -> str:
+        # Vectors from another encoder version are not comparable, so each version has its own index
+        return f"{os.path.splitext(self.path)[0]}.v{getattr(self.encoder, 'VERSION', 1)}.npy"
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        vectors = None
+        index_path = self._index_path()
+        # The index is reused only if it is newer than the JSON file and has the expected shape
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(self.path):
+            try:
+                stacked = np.load(index_path)
+                if stacked.shape == (2, len(entries), self.encoder.dim):
+                    vectors = stacked
+            except (OSError, ValueError) as e:
+                print(f"Question bank index unreadable, rebuilding: {e}")
+        if vectors is None:
+            vectors = self._encode(entries)
+            self._save_index(vectors)
+        with self.lock:
+            self.entries = entries
+            self.vectors, self.question_vectors = vectors[0], vectors[1]
+
+    def _encode(self, entries: list) -> np.ndarray:
+        """
+        Two matrices per bank: full entries (for retrieval) and question text alone (for deduplication).
+        """
+        return np.stack([
+            self.encoder.encode_batch([_entry_text(entry) for entry in entries]),
+            self.encoder.encode_batch([entry["question"] for entry in entries]),
+        ])
+
+    def _save_index(self, vectors: np.ndarray):
+        try:
+            np.save(self._index_path(), vectors)
+        except OSError as e:
+            print(f"Could not save question bank index: {e}")
+
+    def save(self):
+        with self.lock:
+            entries = list(self.entries)
+            vectors = np.stack([self.vectors, self.question_vectors])
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+        self._save_index(vectors)
+
+    def add(self, question: str, ideal_answer: str, skills: list = None):
+        entry = {"question": question, "ideal_answer": ideal_answer, "skills": [skill.lower() for skill in skills or []]}
+        vectors = self._encode([entry])
+        with self.lock:
+            self.entries = self.entries + [entry]
+            self.vectors = np.vstack([self.vectors, vectors[0]])
+            self.question_vectors = np.vstack([self.question_vectors, vectors[1]])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query: str, skills: list = (), asked: list = (), top_k: int = QUESTION_BANK_TOP_K) -> list:
+        """
+        Ranks questions by similarity to the query plus the share of their skill tags found in skills.
+        Questions too similar to any of the asked ones are excluded. Returns [(score, entry)], best first.
+        """
+        with self.lock:
+            entries, vectors, question_vectors = self.entries, self.vectors, self.question_vectors
+        if not entries:
+            return []
+
+        scores = vectors @ self.encoder.encode(query)
+        if skills:
+            wanted = set(skills)
+            overlap = np.array([
+                len(wanted.intersection(entry.get("skills", []))) / len(entry["skills"]) if entry.get("skills") else 0.0
+                for entry in entries
+            ], dtype=np.float32)
+            scores = scores + QUESTION_BANK_SKILL_WEIGHT * overlap
+        if asked:
+            duplicate = (question_vectors @ self.encoder.encode_batch(list(asked)).T).max(axis=1) >= QUESTION_BANK_DUPLICATE_SIMILARITY
+            scores = np.where(duplicate, -np.inf, scores)
+
+        top = np.argsort(-scores)[:top_k]
+        return [(float(scores[i]), entries[i]) for i in top if np.isfinite(scores[i])]
+
+    def pick(self, query: str, skills: list = (), asked: list = (), min_score: float = QUESTION_BANK_MIN_SCORE):
+        """
+        Returns a random one of the best matches scoring at least min_score, or None.
+        """
+        matches = [entry for score, entry in self.search(query, skills, asked) if score >= min_score]
+        return random.choice(matches) if matches else None
+
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """
+    The shared bank, loaded on first use (or by warm_up); None when disabled.
+    """
+    global _question_bank
+    if QUESTION_BANK_ENABLED and _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = QuestionBank()
+    return _question_bank
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Question bank tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="recompute the embedding index")
+    query_parser = subparsers.add_parser("query", help="show the best matches for a CV digest or topic")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--skills", default="", help="comma-separated skill tags")
+    args = parser.parse_args()
+
+    bank = QuestionBank(QUESTION_BANK_PATH)
+    if args.command == "build":
+        bank._save_index(bank._encode(bank.entries))
+        print(f"Indexed {len(bank)} questions into {bank._index_path()}")
+    else:
+        skills = [skill.strip().lower() for skill in args.skills.split(",") if skill.strip()]
+        for score, entry in bank.search(args.text, skills, top_k=10):
+            print(f"{score:.3f}  [{', '.join(entry.get('skills', []))}] {entry['question']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,217 @@
+import html
+import json
+import asyncio
+from string import Template
 from datetime import datetime
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
+
+REPORT_FORMATS = ("text", "html", "json")
+
+# Templates are compiled once at import; the transcript is rendered per entry and joined once
+TEXT_TEMPLATE = Template("""
+INTERVIEW REPORT
+----------------
+Date: $date
+Candidate: $candidate
+
+SCORES:
+- Technical: $technical
+- Communication: $communication
+- Confidence: $confidence
+
+FINAL DECISION: $decision
+Overall Score: $final_score
+
+FEEDBACK:
+$feedback
+
+TRANSCRIPT:
+----------------
+""")
+TEXT_TURN_TEMPLATE = Template("\n[$role]: $content\n")
+
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Interview Report - $candidate</title></head>
+<body>
+<h1>Interview Report</h1>
+<p><strong>Date:</strong> $date<br><strong>Candidate:</strong> $candidate</p>
+<h2>Scores</h2>
+<table>
+<tr><td>Technical</td><td>$technical</td></tr>
+<tr><td>Communication</td><td>$communication</td></tr>
+<tr><td>Confidence</td><td>$confidence</td></tr>
+</table>
+<h2>Final Decision: $decision</h2>
+<p>Overall Score: $final_score</p>
+<h2>Feedback</h2>
+<ul>$feedback</ul>
+<h2>Transcript</h2>
+<dl>$transcript</dl>
+</body></html>
+""")
+HTML_TURN_TEMPLATE = Template("<dt>$role</dt><dd>$content</dd>\n")
+
+
+@dataclass
+class ReportModel:
+    candidate_name: str
+    date: str
+    technical_score: float
+    communication_score: float
+    confidence_score: float
+    decision: str
+    final_score: float
+    feedback: list = field(default_factory=list)
+    transcript: list = field(default_factory=list)  # [{"role", "content"}]
+
+
+def _fmt(value) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def format_date(timestamp: float = None) -> str:
+    return (datetime.fromtimestamp(timestamp) if timestamp else datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
 
 class ReportGenerator:
-    def generate_report(self, candidate_data: dict, scores: dict, decision: dict, transcript: list = None) -> str:
-        report = f"""
-        INTERVIEW REPORT
-        ----------------
-        Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-        Candidate: {candidate_data.get('name', 'Unknown')}
-        
-        SCORES:
-        - Technical: {scores.get('technical_score', 0)}
-        - Communication: {scores.get('communication_score', 0)}
-        - Confidence: {scores.get('confidence_score', 0)}
-        
-        FINAL DECISION: {decision.get('recommendation', 'Pending').upper()}
-        Overall Score: {decision.get('final_score', 0)}
-        
-        FEEDBACK:
-        {self._generate_feedback(scores)}
-        
-        TRANSCRIPT:
-        ----------------
+    def __init__(self, workers: int = 4):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+
+    def build_model(self, candidate_data: dict, scores: dict, decision: dict, transcript: list = None, date: str = None) -> ReportModel:
+        # DecisionAgent reports the outcome under "decision"; "recommendation" is accepted for older callers
+        outcome = decision.get('decision') or decision.get('recommendation') or 'Pending'
+        return ReportModel(
+            candidate_name=candidate_data.get('name', 'Unknown'),
+            date=date or format_date(),
+            technical_score=scores.get('technical_score', 0),
+            communication_score=scores.get('communication_score', 0),
+            confidence_score=scores.get('confidence_score', 0),
+            decision=str(outcome).upper(),
+            final_score=decision.get('final_score', 0),
+            feedback=self._generate_feedback(scores),
+            transcript=[
+                {"role": entry.get('role', 'Unknown'), "content": entry.get('content', '')}
+                for entry in (transcript or [])
+            ],
+        )
+
+    def render_text(self, model: ReportModel) -> str:
+        parts = [TEXT_TEMPLATE.substitute(
+            date=model.date,
+            candidate=model.candidate_name,
+            technical=_fmt(model.technical_score),
+            communication=_fmt(model.communication_score),
+            confidence=_fmt(model.confidence_score),
+            decision=model.decision,
+            final_score=_fmt(model.final_score),
+            feedback="\n".join(model.feedback),
+        )]
+        parts.extend(TEXT_TURN_TEMPLATE.substitute(role=entry["role"].upper(), content=entry["content"]) for entry in model.transcript)
+        return "".join(parts)
+
+    def render_html(self, model: ReportModel) -> str:
+        esc = html.escape
+        return HTML_TEMPLATE.substitute(
+            date=esc(model.date),
+            candidate=esc(model.candidate_name),
+            technical=esc(_fmt(model.technical_score)),
+            communication=esc(_fmt(model.communication_score)),
+            confidence=esc(_fmt(model.confidence_score)),
+            decision=esc(model.decision),
+            final_score=esc(_fmt(model.final_score)),
+            feedback="".join(f"<li>{esc(line)}</li>" for line in model.feedback),
+            transcript="".join(
+                HTML_TURN_TEMPLATE.substitute(role=esc(entry["role"].upper()), content=esc(entry["content"]))
+                for entry in model.transcript
+            ),
+        )
+
+    def render_json(self, model: ReportModel) -> str:
+        return json.dumps(asdict(model))
+
+    def render(self, model: ReportModel, fmt: str = "text") -> str:
+        if fmt == "text":
+            return self.render_text(model)
+        if fmt == "html":
+            return self.render_html(model)
+        if fmt == "json":
+            return self.render_json(model)
+        raise ValueError(f"Unknown report format: {fmt}")
+
+    def generate_report(self, candidate_data: dict, scores: dict, decision: dict, transcript: list = None, fmt: str = "text",
+                        date: str = None) -> str:
+        return self.render(self.build_model(candidate_data, scores, decision, transcript, date), fmt)
+
+    async def agenerate_report(self, candidate_data: dict, scores: dict, decision: dict, transcript: list = None, fmt: str = "text",
+                               date: str = None) -> str:
+        """
+        Renders on the report thread pool so long transcripts never run on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.generate_report, candidate_data, scores, decision, list(transcript or []), fmt, date
+        )
+
+    def model_from_session(self, session: dict) -> ReportModel:
+        """
+        Rebuilds the report model from a stored session (see session_store).
         """
-        
-        if transcript:
-            for entry in transcript:
-                role = entry.get('role', 'Unknown').upper()
-                content = entry.get('content', '')
-                report += f"\n[{role}]: {content}\n"
-        
-        return report
-
-    def _generate_feedback(self, scores):
+        state = session["state"]
+        scores = state.get("scores", [])
+        agg_scores = {
+            key: (sum(score.get(key, 0) for score in scores) / len(scores) if scores else 0)
+            for key in ("technical_score", "communication_score", "confidence_score")
+        }
+        # Stamp the report with the interview's finish time, not the time it is re-rendered
+        date = format_date(state["finished_at"]) if state.get("finished_at") else None
+        return self.build_model(session["candidate_data"], agg_scores, state.get("decision", {}), session["history"], date)
+
+    def regenerate_reports(self, session_store, fmt: str = "text", client_ids: list = None) -> dict:
+        """
+        Re-renders reports for stored finished sessions in parallel. Returns {client_id: report}.
+        """
+        ids = client_ids if client_ids is not None else session_store.list_sessions(finished_only=True)
+
+        def render_one(client_id):
+            session = session_store.load(client_id)
+            if session is None:
+                return client_id, None
+            return client_id, self.render(self.model_from_session(session), fmt)
+
+        return {client_id: report for client_id, report in self.executor.map(render_one, ids) if report is not None}
+
+    def _generate_feedback(self, scores) -> list:
         feedback = []
         if scores.get('technical_score', 0) > 80:
             feedback.append("Strong technical understanding.")
         else:
             feedback.append("Needs improvement in technical concepts.")
-            
+
         if scores.get('communication_score', 0) > 80:
             feedback.append("Clear and articulate communication.")
-            
-        return "\n".join(feedback)
+
+        return feedback
+
+
+def main():
+    import os
+    import argparse
+    from session_store import create_session_store
+
+    parser = argparse.ArgumentParser(description="Re-export reports for all finished interviews in the session store")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="text")
+    parser.add_argument("--out", default="reports")
+    args = parser.parse_args()
+
+    reports = ReportGenerator().regenerate_reports(create_session_store(), args.format)
+    os.makedirs(args.out, exist_ok=True)
+    extension = {"text": "txt", "html": "html", "json": "json"}[args.format]
+    for client_id, report in reports.items():
+        with open(os.path.join(args.out, f"{client_id}.{extension}"), "w", encoding="utf-8") as f:
+            f.write(report)
+    print(f"Wrote {len(reports)} reports to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")  # "memory" or "sqlite"
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def new_state() -> dict:
+    return {
+        "question_count": 0,
+        "current_question": "",
+        "current_ideal_answer": "",
+        "answers": [],  # {"question", "ideal_answer", "answer"} per answered question
+        "scores": [],   # score dicts recorded so far, in answer order
+        "finished": False,
+        "finished_at": None,  # Unix time the interview ended (the report date)
+    }
+
+
+class SessionStore:
+    """
+    Interface for persisting interview sessions by client_id.
+    A session is the candidate data (written once), a small state dict (rewritten per turn)
+    and an append-only transcript, so each turn only writes what changed.
+    """
+    def create(self, client_id: str, candidate_data: dict, state: dict):
+        raise NotImplementedError
+
+    def load(self, client_id: str):
+        """
+        Returns {"candidate_data", "state", "history"} or None.
+        """
+        raise NotImplementedError
+
+    def save_turn(self, client_id: str, state: dict, new_turns: list = None):
+        raise NotImplementedError
+
+    def delete(self, client_id: str):
+        raise NotImplementedError
+
+    def list_sessions(self, finished_only: bool = False) -> list:
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Single-process store; sessions survive reconnects but not restarts. State is deep-copied in
+    and out, so the stored answers and scores are never the lists a live handler is mutating.
+    """
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def create(self, client_id: str, candidate_data: dict, state: dict):
+        with self.lock:
+            self.sessions[client_id] = {"candidate_data": copy.deepcopy(candidate_data), "state": copy.deepcopy(state), "history": []}
+
+    def load(self, client_id: str):
+        with self.lock:
+            session = self.sessions.get(client_id)
+            if session is None:
+                return None
+            return copy.deepcopy(session)
+
+    def save_turn(self, client_id: str, state: dict, new_turns: list = None):
+        with self.lock:
+            session = self.sessions.get(client_id)
+            if session is None:
+                return
+            session["state"] = copy.deepcopy(state)
+            session["history"].extend(copy.deepcopy(new_turns or []))
+
+    def delete(self, client_id: str):
+        with self.lock:
+            self.sessions.pop(client_id, None)
+
+    def list_sessions(self, finished_only: bool = False) -> list:
+        with self.lock:
+            return [cid for cid, session in self.sessions.items() if not finished_only or session["state"].get("finished")]
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    File-backed store shared by every worker on the host. WAL mode keeps per-turn writes cheap
+    and lets readers proceed while another worker writes.
+    """
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "client_id TEXT PRIMARY KEY, candidate_data TEXT, state TEXT, finished INTEGER, updated_at REAL)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS session_turns ("
+                "client_id TEXT, seq INTEGER, role TEXT, content TEXT, PRIMARY KEY (client_id, seq))"
+            )
+            self.db.commit()
+
+    def create(self, client_id: str, candidate_data: dict, state: dict):
+        with self.lock:
+            self.db.execute("DELETE FROM session_turns WHERE client_id = ?", (client_id,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO sessions (client_id, candidate_data, state, finished, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (client_id, _dumps(candidate_data), _dumps(state), int(state.get("finished", False)), time.time()),
+            )
+            self.db.commit()
+
+    def load(self, client_id: str):
+        with self.lock:
+            row = self.db.execute("SELECT candidate_data, state FROM sessions WHERE client_id = ?", (client_id,)).fetchone()
+            if row is None:
+                return None
+            turns = self.db.execute(
+                "SELECT role, content FROM session_turns WHERE client_id = ? ORDER BY seq", (client_id,)
+            ).fetchall()
+        return {
+            "candidate_data": json.loads(row[0]),
+            "state": json.loads(row[1]),
+            "history": [{"role": role, "content": content} for role, content in turns],
+        }
+
+    def save_turn(self, client_id: str, state: dict, new_turns: list = None):
+        with self.lock:
+            if new_turns:
+                start = self.db.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_turns WHERE client_id = ?", (client_id,)
+                ).fetchone()[0]
+                self.db.executemany(
+                    "INSERT INTO session_turns (client_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                    [(client_id, start + i, turn.get("role"), turn.get("content")) for i, turn in enumerate(new_turns)],
+                )
+            self.db.execute(
+                "UPDATE sessions SET state = ?, finished = ?, updated_at = ? WHERE client_id = ?",
+                (_dumps(state), int(state.get("finished", False)), time.time(), client_id),
+            )
+            self.db.commit()
+
+    def delete(self, client_id: str):
+        with self.lock:
+            self.db.execute("DELETE FROM session_turns WHERE client_id = ?", (client_id,))
+            self.db.execute("DELETE FROM sessions WHERE client_id = ?", (client_id,))
+            self.db.commit()
+
+    def list_sessions(self, finished_only: bool = False) -> list:
+        query = "SELECT client_id FROM sessions" + (" WHERE finished = 1" if finished_only else "") + " ORDER BY updated_at"
+        with self.lock:
+            return [row[0] for row in self.db.execute(query).fetchall()]
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    if kind == "memory":
+        return InMemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session store: {kind}")
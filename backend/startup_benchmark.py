@@ -0,0 +1,118 @@
+"""
+Measures worker cold start: import time of main (lazy vs eager imports), time until a fresh
+uvicorn worker answers / and /ready, and WebSocket accept latency on the running worker.
+
+    python startup_benchmark.py --runs 5 --connections 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+import httpx
+import websockets
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASE_ENV = {"SESSION_STORE": "memory", "LLM_CACHE_ENABLED": "false", "GROQ_API_KEY": "benchmark-key"}
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(lazy: bool, runs: int) -> list:
+    env = dict(os.environ, **BASE_ENV, LAZY_IMPORTS=str(lazy).lower())
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=HERE, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def wait_for_status(url: str, status: int, timeout: float = 60) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1).status_code == status:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} did not return {status} within {timeout}s")
+
+
+async def measure_accept(port: int, connections: int) -> list:
+    timings = []
+    for index in range(connections):
+        started = time.perf_counter()
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws/interview/bench-{os.getpid()}-{index}") as ws:
+            timings.append(time.perf_counter() - started)
+            await ws.close()
+    return timings
+
+
+def measure_server(port: int, connections: int, lazy: bool) -> dict:
+    env = dict(os.environ, **BASE_ENV, LAZY_IMPORTS=str(lazy).lower())
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_status(f"http://127.0.0.1:{port}/", 200)
+        alive = time.perf_counter() - started
+        wait_for_status(f"http://127.0.0.1:{port}/ready", 200)
+        ready = time.perf_counter() - started
+        warmup = httpx.get(f"http://127.0.0.1:{port}/ready").json().get("warmup", {})
+        accept = asyncio.run(measure_accept(port, connections))
+    finally:
+        server.terminate()
+        server.wait()
+    return {"alive": alive, "ready": ready, "warmup": warmup, "accept": accept}
+
+
+def ms(value: float) -> str:
+    return f"{value * 1000:.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per import measurement")
+    parser.add_argument("--connections", type=int, default=50, help="WebSocket connections for accept latency")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="startup_benchmark_") as scratch:
+        # Keep the benchmark's interviews and emails out of the real outcome store and outbox
+        BASE_ENV.update(OUTCOMES_DIR=os.path.join(scratch, "outcomes"),
+                        EMAIL_OUTBOX_PATH=os.path.join(scratch, "outbox.db"))
+        results = {
+            "import_lazy": measure_import(True, args.runs),
+            "import_eager": measure_import(False, args.runs),
+            "server": measure_server(args.port, args.connections, lazy=True),
+        }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    server = results["server"]
+    accept = sorted(server["accept"])
+    print("\n--- Startup Benchmark ---")
+    print(f"import main (lazy):   median {ms(statistics.median(results['import_lazy']))}")
+    print(f"import main (eager):  median {ms(statistics.median(results['import_eager']))}")
+    print(f"worker answering /:   {ms(server['alive'])} after spawn")
+    print(f"worker ready:         {ms(server['ready'])} after spawn")
+    for step, seconds in server["warmup"].items():
+        print(f"  warm-up {step:<14} {ms(seconds)}")
+    if accept:
+        print(f"WebSocket accept:     p50 {ms(accept[len(accept) // 2])}   p99 {ms(accept[int(len(accept) * 0.99)])}")
+    print("-------------------------")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ def main():
     
     # 2. Simulate Inputs
     print("\n[Input Phase]")
-    inputs = encoder.process_input(text="Resume content...", audio="audio_bytes", video="video_bytes")
+    inputs = encoder.process_input(text="Resume content...", audio=b"\x00\x10" * 16000, video="video_bytes")
     print(f"Encoded Info: {inputs}")
     
     # 3. Simulate Interview Logic
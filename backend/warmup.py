@@ -0,0 +1,41 @@
+"""
+One-off startup work: load the heavy modules, face cascades, question bank index, LLM clients
+and worker pools before the first interview needs them.
+"""
+import time
+
+from lazy_imports import lazy_import
+from frame_pipeline import get_executor, FRAME_WORKERS
+from encoders import text_encoder
+from question_bank import get_question_bank
+from pdf_extraction import pdf_service
+from llm_client import get_llm_client, get_async_client
+
+
+def warm_up(fraud_detector=None) -> dict:
+    """
+    Runs every warm-up step (blocking; call it off the event loop). A failing step is logged
+    and skipped, since everything would load lazily anyway. Returns {step: seconds}.
+    """
+    timings = {}
+
+    def step(name, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    step("numpy", lambda: lazy_import("numpy").zeros(1))
+    step("opencv", lambda: lazy_import("cv2").getVersionString())
+    if fraud_detector is not None:
+        # Cascades are per thread, so load them on the frame workers
+        step("face_cascades", lambda: list(get_executor().map(lambda _: fraud_detector.face_cascade, range(FRAME_WORKERS))))
+    step("text_encoder", lambda: text_encoder.encode("warm up"))
+    step("question_bank", get_question_bank)
+
+    llm = get_llm_client()
+    step("llm_clients", lambda: llm.api_key and (llm.client, get_async_client(llm.api_key)))
+    step("pdf_workers", pdf_service.warm_up)
+    return timings
@@ -19,6 +19,7 @@ const InterviewRoom = () => {
     const fraudTimeoutRef = useRef(null);
     const topBarRef = useRef(null);
     const bottomBarRef = useRef(null);
+    const questionStreamingRef = useRef(false);
 
     // State
     const [isMicOn, setIsMicOn] = useState(false);
@@ -94,7 +95,13 @@ const InterviewRoom = () => {
 
             ws.current.onmessage = (event) => {
                 const data = JSON.parse(event.data);
-                if (data.type === 'question') {
+                if (data.type === 'question_chunk') {
+                    // Partial question text while the backend is still generating
+                    const isFirstChunk = !questionStreamingRef.current;
+                    questionStreamingRef.current = true;
+                    setCurrentQuestion(prev => isFirstChunk ? data.payload : prev + data.payload);
+                } else if (data.type === 'question') {
+                    questionStreamingRef.current = false;
                     setCurrentQuestion(data.payload);
                     addMessage('agent', data.payload);
                 } else if (data.type === 'interview_end') {